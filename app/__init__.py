@@ -16,7 +16,15 @@ def create_app(config_class=Config):
 
     # Initialize extensions
     db.init_app(app)
+    from app.utils.database import configure_database
+    configure_database(app)
+    from app.utils.instrumentation import sql_instrumentation
+    sql_instrumentation.init_app(app)
+    from app.utils.metrics import metrics
+    metrics.init_app(app)
     login.init_app(app)
+    from app.utils.access import access_cache
+    access_cache.init_app(app)
     csrf.init_app(app)
     
     # Initialize mail only if email settings are configured
@@ -43,8 +51,29 @@ def create_app(config_class=Config):
     app.register_blueprint(teacher_bp)
     app.register_blueprint(student_bp)
 
-    # Create database tables
-    with app.app_context():
-        db.create_all()
+    # Background grading workers (used when GRADING_MODE is 'async')
+    from app.utils.grading_queue import grading_queue
+    grading_queue.init_app(app)
+
+    # Cache of rendered fragments shared by all users (the take page's question list)
+    from app.utils.render_cache import fragment_cache
+    fragment_cache.init_app(app)
+
+    # Fingerprinted, precompressed static files and the asset_url() template helper
+    from app.utils.assets import assets
+    assets.init_app(app)
+
+    # Register CLI commands
+    from app.cli import register_commands
+    register_commands(app)
+
+    # On-demand request profiling (only installed when PROFILER_TOKEN is set)
+    from app.utils.profiler import init_profiler
+    init_profiler(app)
+
+    # Tables are created by `flask schema upgrade`; only check the version here
+    if not app.config['SKIP_SCHEMA_CHECK']:
+        from app.utils.schema import check_schema_version
+        check_schema_version(app)
 
     return app 
\ No newline at end of file
@@ -0,0 +1,182 @@
+import time
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from app import db
+
+grading_cli = AppGroup('grading', help='Manage the background grading queue.')
+
+
+@grading_cli.command('work')
+@click.option('--workers', type=int, default=None, help='Number of worker threads (default: GRADING_WORKERS).')
+def grading_work(workers):
+    """Run grading workers in the foreground until interrupted."""
+    pool = current_app.extensions['grading_queue']
+    pool.start(workers)
+    click.echo(f'Grading with {len(pool.threads)} worker(s). Press Ctrl+C to stop.')
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pool.stop()
+
+
+@grading_cli.command('status')
+def grading_status():
+    """Show how many grading jobs are in each state."""
+    from app.models.grading_job import GradingJob
+    counts = db.session.query(GradingJob.status, db.func.count(GradingJob.id))\
+        .group_by(GradingJob.status).all()
+    for status, count in sorted(counts):
+        click.echo(f'{status}: {count}')
+    if not counts:
+        click.echo('No grading jobs.')
+
+
+stats_cli = AppGroup('stats', help='Manage precomputed quiz statistics.')
+
+
+@stats_cli.command('rebuild')
+@click.option('--quiz-id', type=int, default=None, help='Only rebuild this quiz (default: all quizzes).')
+def stats_rebuild(quiz_id):
+    """Recompute quiz statistics from the attempts table."""
+    from app.models.quiz import Quiz
+    from app.models.quiz_stats import QuizStats
+    quiz_ids = [quiz_id] if quiz_id else [row.id for row in db.session.query(Quiz.id)]
+    for index, current_id in enumerate(quiz_ids, 1):
+        QuizStats.rebuild(current_id)
+        if index % 500 == 0:
+            db.session.commit()
+    db.session.commit()
+    click.echo(f'Rebuilt statistics for {len(quiz_ids)} quiz(zes).')
+
+
+schema_cli = AppGroup('schema', help='Create and upgrade the database schema.')
+
+
+@schema_cli.command('upgrade')
+def schema_upgrade():
+    """Apply pending schema migrations (safe to run on an existing quizwizz.db)."""
+    from app.utils.schema import upgrade
+    version = upgrade(db.engine, log=click.echo)
+    click.echo(f'Schema is at version {version}.')
+
+
+@schema_cli.command('version')
+def schema_version():
+    """Show the current and latest schema versions."""
+    from app.utils.schema import current_version, LATEST_VERSION
+    with db.engine.connect() as connection:
+        version = current_version(connection)
+    click.echo(f'Database schema version {version} (latest {LATEST_VERSION}).')
+
+
+@schema_cli.command('check-plans')
+def schema_check_plans():
+    """Fail if any hot query would read a whole table instead of using an index."""
+    from app.utils.schema import full_table_scans, hot_queries
+    with db.engine.connect() as connection:
+        if connection.dialect.name != 'sqlite':
+            raise click.ClickException('Query plans can only be checked on SQLite.')
+        scans = full_table_scans(connection)
+    for name, step in scans:
+        click.echo(f'FULL SCAN  {name}: {step}', err=True)
+    if scans:
+        raise SystemExit(1)
+    click.echo(f'All {len(hot_queries())} hot queries use indexes.')
+
+
+search_cli = AppGroup('search', help='Manage the quiz search index.')
+
+
+@search_cli.command('rebuild')
+def search_rebuild():
+    """Rebuild the full-text search index from the quizzes table."""
+    from app.utils.search import rebuild_search_index
+    if rebuild_search_index():
+        click.echo('Rebuilt the quiz search index.')
+    else:
+        click.echo('Full-text search is not available on this database; searches use LIKE matching.')
+
+
+export_cli = AppGroup('export', help='Bulk data exports for offline analysis.')
+
+
+@export_cli.command('answers')
+@click.option('--author', default=None, help='Only quizzes by this username.')
+@click.option('--category', default=None, help='Only quizzes in this category.')
+@click.option('--format', 'export_format', type=click.Choice(['csv', 'ndjson']), default='csv')
+@click.option('--gzip', 'compress', is_flag=True, help='Gzip-compress the output.')
+@click.option('--output', '-o', type=click.Path(dir_okay=False), required=True, help='File to write.')
+def export_answers(author, category, export_format, compress, output):
+    """Export every answer in long format, streamed in keyset batches."""
+    from app.models.user import User
+    from app.utils.export import answer_export_statement, answer_export_chunks, gzip_chunks
+    author_id = None
+    if author:
+        user = User.query.filter_by(username=author).first()
+        if user is None:
+            raise click.ClickException(f'No user named {author}.')
+        author_id = user.id
+
+    chunks = answer_export_chunks(answer_export_statement(author_id, category), export_format)
+    if compress:
+        with open(output, 'wb') as f:
+            for chunk in gzip_chunks(chunks):
+                f.write(chunk)
+    else:
+        with open(output, 'w', encoding='utf-8', newline='') as f:
+            for chunk in chunks:
+                f.write(chunk)
+    click.echo(f'Wrote {output}')
+
+
+@click.command('seed')
+@click.option('--scale', type=click.Choice(['small', 'medium', 'large']), default='small',
+              help='Preset sizes; large is 500 teachers, 50k students, 20k quizzes, 2M attempts, ~50M answers.')
+@click.option('--teachers', type=int, default=None, help='Override the preset number of teachers.')
+@click.option('--students', type=int, default=None, help='Override the preset number of students.')
+@click.option('--quizzes', type=int, default=None, help='Override the preset number of quizzes.')
+@click.option('--attempts', type=int, default=None, help='Override the preset number of attempts.')
+@click.option('--questions', type=int, default=None, help='Override the preset mean questions per quiz.')
+@click.option('--days', type=int, default=365, help='Length of the activity window in days.')
+@click.option('--until', type=click.DateTime(formats=['%Y-%m-%d']), default=None,
+              help='End of the activity window (default: 2026-01-01).')
+@click.option('--seed', 'random_seed', type=int, default=0, help='Random seed.')
+def seed(scale, teachers, students, quizzes, attempts, questions, days, until, random_seed):
+    """Fill an empty database with deterministic synthetic data."""
+    from app.utils.seed import SCALES, SEED_PASSWORD, seed_database
+    sizes = dict(SCALES[scale])
+    overrides = dict(teachers=teachers, students=students, quizzes=quizzes, attempts=attempts, questions=questions)
+    sizes.update({name: value for name, value in overrides.items() if value is not None})
+    if min(sizes['teachers'], sizes['students'], sizes['quizzes'], sizes['questions']) < 1:
+        raise click.ClickException('Teachers, students, quizzes and questions must be at least 1.')
+    started = time.perf_counter()
+    try:
+        seed_database(days=days, until=until, seed=random_seed, log=click.echo, **sizes)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f'Seeded in {time.perf_counter() - started:.0f} s. '
+               f'Log in as teacher0001 or student000001 with password "{SEED_PASSWORD}".')
+
+
+assets_cli = AppGroup('assets', help='Build fingerprinted static assets.')
+
+
+@assets_cli.command('build')
+def assets_build():
+    """Write content-hashed copies of app/static with .gz (and .br) variants and a manifest."""
+    from app.utils.assets import build_assets, brotli
+    manifest = build_assets(current_app.static_folder, current_app.config['ASSETS_DIR'], log=click.echo)
+    click.echo(f'Built {len(manifest)} asset(s) into {current_app.config["ASSETS_DIR"]}'
+               + ('' if brotli else ' (install brotli for .br files)') + '. Restart the app to pick them up.')
+
+
+def register_commands(app):
+    app.cli.add_command(grading_cli)
+    app.cli.add_command(stats_cli)
+    app.cli.add_command(schema_cli)
+    app.cli.add_command(search_cli)
+    app.cli.add_command(export_cli)
+    app.cli.add_command(seed)
+    app.cli.add_command(assets_cli)
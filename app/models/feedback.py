@@ -3,6 +3,9 @@ from app import db
 
 class QuizFeedback(db.Model):
     __tablename__ = 'quiz_feedback'
+    __table_args__ = (
+        db.Index('ix_quiz_feedback_quiz_id', 'quiz_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False)
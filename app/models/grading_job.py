@@ -0,0 +1,24 @@
+from datetime import datetime
+from app import db
+
+class GradingJob(db.Model):
+    __tablename__ = 'grading_jobs'
+
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    id = db.Column(db.Integer, primary_key=True)
+    attempt_id = db.Column(db.Integer, db.ForeignKey('quiz_attempts.id'), nullable=False, unique=True)
+    status = db.Column(db.String(20), nullable=False, default=PENDING, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+    error = db.Column(db.Text)
+
+    # Relationships
+    attempt = db.relationship('QuizAttempt', backref=db.backref('grading_job', uselist=False, cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<GradingJob {self.id}: Attempt {self.attempt_id} ({self.status})>'
@@ -11,6 +11,10 @@ user_bookmarks = db.Table('user_bookmarks',
 
 class Quiz(db.Model):
     __tablename__ = 'quizzes'
+    __table_args__ = (
+        db.Index('ix_quizzes_author_id_created_at', 'author_id', 'created_at'),
+        db.Index('ix_quizzes_is_public_created_at', 'is_public', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
@@ -29,7 +33,8 @@ class Quiz(db.Model):
     
     # Relationships
     author = db.relationship('User', back_populates='quizzes')
-    questions = db.relationship('Question', back_populates='quiz', cascade='all, delete-orphan')
+    questions = db.relationship('Question', back_populates='quiz', cascade='all, delete-orphan',
+                                order_by='(Question.order, Question.id)')
     attempts = db.relationship('QuizAttempt', back_populates='quiz', cascade='all, delete-orphan')
     shared_with_users = db.relationship('User', secondary='shared_quizzes', back_populates='shared_quizzes', lazy='dynamic', overlaps="shared_quizzes_list,shared_with")
     feedback = db.relationship(QuizFeedback, backref='quiz', lazy='dynamic', cascade='all, delete-orphan')
@@ -39,6 +44,9 @@ class Quiz(db.Model):
 
 class Question(db.Model):
     __tablename__ = 'questions'
+    __table_args__ = (
+        db.Index('ix_questions_quiz_id_order', 'quiz_id', 'order'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False)
@@ -49,7 +57,8 @@ class Question(db.Model):
     
     # Relationships
     quiz = db.relationship('Quiz', back_populates='questions')
-    options = db.relationship('QuestionOption', back_populates='question', lazy='dynamic', cascade='all, delete-orphan')
+    options = db.relationship('QuestionOption', back_populates='question', cascade='all, delete-orphan',
+                              order_by='(QuestionOption.order, QuestionOption.id)')
     answers = db.relationship('Answer', back_populates='question', lazy='dynamic')
 
     def __repr__(self):
@@ -57,6 +66,9 @@ class Question(db.Model):
 
 class QuestionOption(db.Model):
     __tablename__ = 'question_options'
+    __table_args__ = (
+        db.Index('ix_question_options_question_id_order', 'question_id', 'order'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     question_id = db.Column(db.Integer, db.ForeignKey('questions.id'), nullable=False)
@@ -72,6 +84,9 @@ class QuestionOption(db.Model):
 
 class Answer(db.Model):
     __tablename__ = 'answers'
+    __table_args__ = (
+        db.Index('ix_answers_attempt_id_question_id', 'attempt_id', 'question_id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     attempt_id = db.Column(db.Integer, db.ForeignKey('quiz_attempts.id'), nullable=False)
@@ -92,6 +107,10 @@ class Answer(db.Model):
 
 class QuizAttempt(db.Model):
     __tablename__ = 'quiz_attempts'
+    __table_args__ = (
+        db.Index('ix_quiz_attempts_quiz_id_started_at', 'quiz_id', 'started_at'),
+        db.Index('ix_quiz_attempts_student_id_started_at', 'student_id', 'started_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), nullable=False)
@@ -112,6 +131,6 @@ class QuizAttempt(db.Model):
     
     @property
     def percentage_score(self):
-        if self.max_score and self.max_score > 0:
+        if self.score is not None and self.max_score and self.max_score > 0:
             return (self.score / self.max_score) * 100
         return 0 
\ No newline at end of file
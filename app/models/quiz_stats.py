@@ -0,0 +1,186 @@
+from datetime import datetime
+from math import sqrt
+from sqlalchemy import case, func, literal, select, true
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app import db
+from app.models.quiz import Quiz, Question, QuizAttempt
+
+class QuizStats(db.Model):
+    """Per-quiz score aggregates, kept up to date as attempts are started and graded."""
+    __tablename__ = 'quiz_stats'
+
+    quiz_id = db.Column(db.Integer, db.ForeignKey('quizzes.id'), primary_key=True)
+    attempt_count = db.Column(db.Integer, nullable=False, default=0)
+    completed_count = db.Column(db.Integer, nullable=False, default=0)
+    graded_count = db.Column(db.Integer, nullable=False, default=0)  # attempts with a score
+    score_sum = db.Column(db.Float, nullable=False, default=0)
+    score_sq_sum = db.Column(db.Float, nullable=False, default=0)
+    lowest_score = db.Column(db.Float)
+    highest_score = db.Column(db.Float)
+    total_points = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Relationships
+    quiz = db.relationship(Quiz, backref=db.backref('stats', uselist=False, cascade='all, delete-orphan'))
+
+    def __repr__(self):
+        return f'<QuizStats {self.quiz_id}>'
+
+    @property
+    def avg_score(self):
+        return self.score_sum / self.graded_count if self.graded_count else 0
+
+    @property
+    def avg_percentage(self):
+        return (self.avg_score / self.total_points) * 100 if self.total_points else 0
+
+    @property
+    def score_stddev(self):
+        if not self.graded_count:
+            return 0
+        variance = self.score_sq_sum / self.graded_count - self.avg_score ** 2
+        return sqrt(max(variance, 0))
+
+    @classmethod
+    def rebuild(cls, quiz_id):
+        """Recompute a quiz's statistics from its attempts and questions."""
+        attempt_count, completed_count, graded_count, score_sum, score_sq_sum, lowest, highest = db.session.query(
+            func.count(QuizAttempt.id),
+            func.count(QuizAttempt.completed_at),
+            func.count(QuizAttempt.score),
+            func.coalesce(func.sum(QuizAttempt.score), 0),
+            func.coalesce(func.sum(QuizAttempt.score * QuizAttempt.score), 0),
+            func.min(QuizAttempt.score),
+            func.max(QuizAttempt.score)
+        ).filter(QuizAttempt.quiz_id == quiz_id).one()
+        total_points = db.session.query(func.coalesce(func.sum(Question.points), 0))\
+            .filter(Question.quiz_id == quiz_id).scalar()
+
+        stats = cls.query.get(quiz_id)
+        if stats is None:
+            stats = cls(quiz_id=quiz_id)
+            db.session.add(stats)
+        stats.attempt_count = attempt_count
+        stats.completed_count = completed_count
+        stats.graded_count = graded_count
+        stats.score_sum = score_sum
+        stats.score_sq_sum = score_sq_sum
+        stats.lowest_score = lowest
+        stats.highest_score = highest
+        stats.total_points = total_points
+        stats.updated_at = datetime.utcnow()
+        return stats
+
+    @classmethod
+    def aggregate_select(cls, quiz_ids=None):
+        """SELECT of freshly computed quiz_stats rows, one per quiz (all quizzes, or only quiz_ids)."""
+        attempts = select(
+            QuizAttempt.quiz_id,
+            func.count(QuizAttempt.id).label('attempt_count'),
+            func.count(QuizAttempt.completed_at).label('completed_count'),
+            func.count(QuizAttempt.score).label('graded_count'),
+            func.sum(QuizAttempt.score).label('score_sum'),
+            func.sum(QuizAttempt.score * QuizAttempt.score).label('score_sq_sum'),
+            func.min(QuizAttempt.score).label('lowest_score'),
+            func.max(QuizAttempt.score).label('highest_score')
+        ).group_by(QuizAttempt.quiz_id)
+        points = select(Question.quiz_id, func.sum(Question.points).label('total_points')).group_by(Question.quiz_id)
+        quizzes = true()  # SQLite needs a WHERE before an upsert's ON CONFLICT
+        if quiz_ids is not None:
+            attempts = attempts.where(QuizAttempt.quiz_id.in_(quiz_ids))
+            points = points.where(Question.quiz_id.in_(quiz_ids))
+            quizzes = Quiz.id.in_(quiz_ids)
+        attempts, points = attempts.subquery(), points.subquery()
+        return select(
+            Quiz.id.label('quiz_id'),
+            func.coalesce(attempts.c.attempt_count, 0).label('attempt_count'),
+            func.coalesce(attempts.c.completed_count, 0).label('completed_count'),
+            func.coalesce(attempts.c.graded_count, 0).label('graded_count'),
+            func.coalesce(attempts.c.score_sum, 0).label('score_sum'),
+            func.coalesce(attempts.c.score_sq_sum, 0).label('score_sq_sum'),
+            attempts.c.lowest_score,
+            attempts.c.highest_score,
+            func.coalesce(points.c.total_points, 0).label('total_points'),
+            literal(datetime.utcnow(), db.DateTime).label('updated_at')
+        ).select_from(Quiz.__table__.outerjoin(attempts, attempts.c.quiz_id == Quiz.id)
+                      .outerjoin(points, points.c.quiz_id == Quiz.id)).where(quizzes)
+
+    @classmethod
+    def insert_missing(cls, quiz_ids=None):
+        """INSERT computed rows for quizzes that have none, skipping rows another
+        transaction inserted first (ON CONFLICT DO NOTHING)."""
+        columns = [column.name for column in cls.__table__.columns]
+        return sqlite_insert(cls.__table__).from_select(columns, cls.aggregate_select(quiz_ids))\
+            .on_conflict_do_nothing(index_elements=['quiz_id'])
+
+    @classmethod
+    def for_quizzes(cls, quiz_ids):
+        """Return {quiz_id: QuizStats} in one query.
+
+        Read-only: a quiz without a row (only possible on a database that skipped
+        the backfill migration) gets statistics computed on the fly, not stored.
+        """
+        quiz_ids = list(quiz_ids)
+        stats = {s.quiz_id: s for s in cls.query.filter(cls.quiz_id.in_(quiz_ids))} if quiz_ids else {}
+        missing = [quiz_id for quiz_id in quiz_ids if quiz_id not in stats]
+        if missing:
+            for row in db.session.execute(cls.aggregate_select(missing)):
+                stats[row.quiz_id] = cls(**row._mapping)  # transient, never added to the session
+        return stats
+
+    @classmethod
+    def for_quiz(cls, quiz_id):
+        return cls.for_quizzes([quiz_id])[quiz_id]
+
+    @classmethod
+    def _increment(cls, quiz_id, values):
+        """Apply an in-place UPDATE, inserting the quiz's row first if it has none yet."""
+        values[cls.updated_at] = datetime.utcnow()
+        db.session.flush()
+        updated = cls.query.filter_by(quiz_id=quiz_id).update(values, synchronize_session=False)
+        if updated:
+            return
+        # A row computed now already counts the change being recorded. If another
+        # transaction inserted it first, it did not, so apply the update after all.
+        inserted = db.session.execute(cls.insert_missing([quiz_id])).rowcount
+        if not inserted:
+            cls.query.filter_by(quiz_id=quiz_id).update(values, synchronize_session=False)
+
+    @classmethod
+    def record_attempt_started(cls, quiz_id):
+        cls._increment(quiz_id, {cls.attempt_count: cls.attempt_count + 1})
+
+    @classmethod
+    def record_attempt_completed(cls, quiz_id, score=None):
+        """Count a submitted attempt, and its score if it has already been graded."""
+        values = {cls.completed_count: cls.completed_count + 1}
+        if score is not None:
+            values.update(cls._score_values(score))
+        cls._increment(quiz_id, values)
+
+    @classmethod
+    def record_score(cls, quiz_id, score):
+        """Add the score of an attempt that was graded after it was submitted."""
+        cls._increment(quiz_id, cls._score_values(score))
+
+    @classmethod
+    def refresh_total_points(cls, quiz_id):
+        """Recompute total points after a quiz's questions change."""
+        db.session.flush()
+        total_points = db.session.query(func.coalesce(func.sum(Question.points), 0))\
+            .filter(Question.quiz_id == quiz_id).scalar_subquery()
+        cls._increment(quiz_id, {cls.total_points: total_points})
+
+    @classmethod
+    def _score_values(cls, score):
+        return {
+            cls.graded_count: cls.graded_count + 1,
+            cls.score_sum: cls.score_sum + score,
+            cls.score_sq_sum: cls.score_sq_sum + score * score,
+            cls.lowest_score: case((cls.lowest_score.is_(None), score),
+                                   (cls.lowest_score > score, score),
+                                   else_=cls.lowest_score),
+            cls.highest_score: case((cls.highest_score.is_(None), score),
+                                    (cls.highest_score < score, score),
+                                    else_=cls.highest_score),
+        }
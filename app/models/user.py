@@ -48,7 +48,9 @@ class User(UserMixin, db.Model):
 
 @login.user_loader
 def load_user(id):
-    return User.query.get(int(id))
+    # Served from a short-lived per-process cache instead of a query on every request
+    from app.utils.access import access_cache
+    return access_cache.load_user(int(id))
 
 # Association table for shared quizzes
 shared_quizzes = db.Table('shared_quizzes',
@@ -0,0 +1,121 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from sqlalchemy import exists
+from sqlalchemy.orm import make_transient_to_detached
+from app import db
+from app.models.user import User, shared_quizzes
+
+# Columns kept for a cached user. The password hash is left out: it is only read
+# at login, which queries the user directly, and loads on access otherwise.
+_USER_COLUMNS = [column.key for column in User.__table__.columns if column.key != 'password_hash']
+
+
+class TTLCache:
+    """A bounded dict whose entries expire ttl seconds after they were stored."""
+
+    def __init__(self):
+        self.ttl = 0
+        self.max_entries = 0
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def configure(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clear()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value):
+        if self.ttl <= 0 or self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)  # oldest first
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_where(self, predicate):
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class AccessCache:
+    """The lookups made on almost every request: the logged-in user and whether a
+    private quiz has been shared with them.
+
+    Both are cached per process for a short TTL. Other worker processes see a
+    profile edit once their entry expires. Only granted shares are cached, so a
+    quiz shared on one worker is visible to the others straight away.
+    """
+
+    def __init__(self, app=None):
+        self.users = TTLCache()
+        self.shares = TTLCache()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['access_cache'] = self
+        self.users.configure(app.config['USER_CACHE_TTL'], app.config['ACCESS_CACHE_ENTRIES'])
+        self.shares.configure(app.config['SHARE_CACHE_TTL'], app.config['ACCESS_CACHE_ENTRIES'])
+
+    def load_user(self, user_id):
+        """Return the user for a session, building it from the cache without a query when possible."""
+        values = self.users.get(user_id)
+        if values is None:
+            user = User.query.get(user_id)
+            if user is not None:
+                self.users.set(user_id, {key: getattr(user, key) for key in _USER_COLUMNS})
+            return user
+        user = User(**values)
+        make_transient_to_detached(user)  # as if loaded; the password hash is marked expired
+        return db.session.merge(user, load=False)
+
+    def forget_user(self, user_id):
+        """Drop the cached user after their profile changes."""
+        self.users.discard(user_id)
+
+    def is_shared_with(self, user_id, quiz_id):
+        """True if the quiz has been shared with the user (password entered or link opened)."""
+        if self.shares.get((user_id, quiz_id)):
+            return True
+        shared = db.session.query(exists().where(shared_quizzes.c.user_id == user_id)
+                                          .where(shared_quizzes.c.quiz_id == quiz_id)).scalar()
+        if shared:
+            self.shares.set((user_id, quiz_id), True)
+        return shared
+
+    def share_quiz(self, user_id, quiz_id):
+        """Share the quiz with the user. Returns False if it already was; the caller commits."""
+        if self.is_shared_with(user_id, quiz_id):
+            return False
+        db.session.execute(shared_quizzes.insert().values(user_id=user_id, quiz_id=quiz_id))
+        return True
+
+    def unshare_quiz(self, quiz_id):
+        """Remove the quiz from every user it was shared with; the caller commits."""
+        db.session.execute(shared_quizzes.delete().where(shared_quizzes.c.quiz_id == quiz_id))
+        self.shares.discard_where(lambda key: key[1] == quiz_id)
+
+
+access_cache = AccessCache()
@@ -0,0 +1,219 @@
+import numpy as np
+from sqlalchemy import case, func, select
+from app import db
+from app.models.quiz import Answer, Question, QuestionOption, QuizAttempt
+
+
+def question_answer_counts(quiz_id):
+    """Return {question_id: (correct_count, answer_count)} over completed attempts, in one grouped query."""
+    rows = db.session.query(
+        Answer.question_id,
+        func.sum(case((Answer.is_correct == True, 1), else_=0)),
+        func.count(Answer.id)
+    ).join(QuizAttempt, QuizAttempt.id == Answer.attempt_id)\
+        .filter(QuizAttempt.quiz_id == quiz_id, QuizAttempt.completed_at.isnot(None))\
+        .group_by(Answer.question_id)\
+        .all()
+    return {question_id: (correct or 0, total) for question_id, correct, total in rows}
+
+
+def score_matrix(quiz_id, question_ids):
+    """Load points earned into a dense attempts x questions array from a single query.
+
+    Only completed, graded attempts are included; unanswered questions count as 0.
+    Returns (attempt_ids, matrix) with columns in the order of question_ids.
+    """
+    answer_table, attempt_table = Answer.__table__, QuizAttempt.__table__
+    # Executed through the session, so engine events (SQL instrumentation, metrics) see it.
+    # The columns are plain integers and floats that need no type conversion, so the rows
+    # are read straight from the DB-API cursor: building 500k Row objects costs more than
+    # the query itself.
+    result = db.session.execute(
+        select(answer_table.c.attempt_id, answer_table.c.question_id, answer_table.c.points_earned)
+        .join(attempt_table, attempt_table.c.id == answer_table.c.attempt_id)
+        .where(attempt_table.c.quiz_id == quiz_id,
+               attempt_table.c.completed_at.isnot(None),
+               attempt_table.c.score.isnot(None))
+    )
+    try:
+        rows = result.cursor.fetchall()
+    finally:
+        result.close()
+    if not rows or not question_ids:
+        return np.array([], dtype=np.int64), np.zeros((0, len(question_ids)))
+
+    # Building the arrays column by column is much faster than from a list of Row objects
+    answer_attempt_ids, answer_qids, points_earned = zip(*rows)
+    attempt_ids, row_index = np.unique(np.array(answer_attempt_ids, dtype=np.int64), return_inverse=True)
+
+    # Map question ids to column positions; answers to removed questions are dropped
+    order = np.argsort(question_ids)
+    sorted_ids = np.asarray(question_ids, dtype=np.int64)[order]
+    answer_qids = np.array(answer_qids, dtype=np.int64)
+    positions = np.clip(np.searchsorted(sorted_ids, answer_qids), 0, len(sorted_ids) - 1)
+    known = sorted_ids[positions] == answer_qids
+
+    matrix = np.zeros((len(attempt_ids), len(question_ids)))
+    matrix[row_index[known], order[positions[known]]] = np.nan_to_num(np.array(points_earned, dtype=float)[known])
+    return attempt_ids, matrix
+
+
+def _correlations(x, y):
+    """Column-wise Pearson correlation of two equally shaped arrays; NaN where undefined."""
+    xc = x - x.mean(axis=0)
+    yc = y - y.mean(axis=0)
+    denominator = np.sqrt((xc ** 2).sum(axis=0) * (yc ** 2).sum(axis=0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, (xc * yc).sum(axis=0) / denominator, np.nan)
+
+
+class ItemAnalysis:
+    """Classical item analysis of one quiz, computed column-wise over the score matrix.
+
+    difficulty      mean share of the question's points earned (higher is easier)
+    discrimination  difficulty in the top 27% of total scores minus the bottom 27%
+    point_biserial  correlation of the item score with the rest of the test
+                    (total minus the item, so the item does not correlate with itself)
+    alpha           Cronbach's alpha reliability of the whole quiz
+    """
+
+    GROUP_FRACTION = 0.27
+
+    def __init__(self, question_ids, points, matrix):
+        self.question_ids = list(question_ids)
+        self._columns = {question_id: index for index, question_id in enumerate(self.question_ids)}
+        self.num_attempts, num_questions = matrix.shape
+        self.difficulty = np.full(num_questions, np.nan)
+        self.discrimination = np.full(num_questions, np.nan)
+        self.point_biserial = np.full(num_questions, np.nan)
+        self.alpha = None
+        if self.num_attempts == 0 or num_questions == 0:
+            return
+
+        points = np.asarray(points, dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fractions = np.where(points > 0, matrix / points, 0)
+        totals = matrix.sum(axis=1)
+
+        self.difficulty = fractions.mean(axis=0)
+
+        group_size = max(1, int(round(self.num_attempts * self.GROUP_FRACTION)))
+        if self.num_attempts >= 2 * group_size:
+            ranked = np.argsort(totals, kind='stable')
+            lower = fractions[ranked[:group_size]].mean(axis=0)
+            upper = fractions[ranked[-group_size:]].mean(axis=0)
+            self.discrimination = upper - lower
+
+        self.point_biserial = _correlations(matrix, totals[:, None] - matrix)
+
+        total_variance = totals.var(ddof=1) if self.num_attempts > 1 else 0
+        if num_questions > 1 and total_variance > 0:
+            item_variance = matrix.var(axis=0, ddof=1).sum()
+            self.alpha = float(num_questions / (num_questions - 1) * (1 - item_variance / total_variance))
+
+    @classmethod
+    def for_quiz(cls, quiz):
+        questions = quiz.questions
+        question_ids = [question.id for question in questions]
+        _, matrix = score_matrix(quiz.id, question_ids)
+        return cls(question_ids, [question.points or 0 for question in questions], matrix)
+
+    def for_question(self, question_id):
+        """Return the item statistics of one question as plain floats (None when undefined)."""
+        index = self._columns[question_id]
+        values = (self.difficulty[index], self.discrimination[index], self.point_biserial[index])
+        return dict(zip(('difficulty', 'discrimination', 'point_biserial'),
+                        (None if np.isnan(value) else round(float(value), 3) for value in values)))
+
+
+def question_stats(quiz, item_analysis=None):
+    """Per-question correct counts, success rates and item statistics for the quiz results page."""
+    counts = question_answer_counts(quiz.id)
+    if item_analysis is None:
+        item_analysis = ItemAnalysis.for_quiz(quiz)
+    stats = []
+    for question in quiz.questions:
+        correct_count, total_answers = counts.get(question.id, (0, 0))
+        success_rate = (correct_count / total_answers * 100) if total_answers > 0 else 0
+        stat = {
+            'question': question,
+            'correct_count': correct_count,
+            'total_attempts': total_answers,
+            'success_rate': round(success_rate, 2)
+        }
+        stat.update(item_analysis.for_question(question.id))
+        stats.append(stat)
+    return stats
+
+
+# Minimum responses to a question before options are flagged by quartile comparison
+DISTRACTOR_MIN_RESPONSES = 8
+
+
+def distractor_counts(quiz_id):
+    """Count MCQ option picks per score quartile with one aggregate query.
+
+    Attempts are split into quartiles by score with NTILE(4) (1 = lowest scores),
+    so attempts with tied scores may land in neighbouring quartiles. Returns
+    {(question_id, option_id): [q1, q2, q3, q4]}; option_id None means skipped.
+    """
+    answer_table, attempt_table, question_table = Answer.__table__, QuizAttempt.__table__, Question.__table__
+    ranked = select(
+        attempt_table.c.id,
+        func.ntile(4).over(order_by=(attempt_table.c.score, attempt_table.c.id)).label('quartile')
+    ).where(attempt_table.c.quiz_id == quiz_id,
+            attempt_table.c.completed_at.isnot(None),
+            attempt_table.c.score.isnot(None)).subquery()
+
+    result = db.session.execute(
+        select(answer_table.c.question_id, answer_table.c.selected_option_id, ranked.c.quartile, func.count())
+        .join(ranked, ranked.c.id == answer_table.c.attempt_id)
+        .join(question_table, question_table.c.id == answer_table.c.question_id)
+        .where(question_table.c.question_type == 'mcq')
+        .group_by(answer_table.c.question_id, answer_table.c.selected_option_id, ranked.c.quartile)
+    )
+    counts = {}
+    for question_id, option_id, quartile, count in result:
+        counts.setdefault((question_id, option_id), [0, 0, 0, 0])[quartile - 1] += count
+    return counts
+
+
+def distractor_report(quiz):
+    """Per-MCQ option pick counts by score quartile, with problem options flagged.
+
+    A wrong option is flagged when nobody picks it, or when the top quartile picks
+    it more often than the bottom quartile; the correct option is flagged when the
+    bottom quartile picks it more often than the top quartile.
+    """
+    counts = distractor_counts(quiz.id)
+    questions = [question for question in quiz.questions if question.question_type == 'mcq']
+    options_by_question = {}
+    if questions:
+        options = QuestionOption.query\
+            .filter(QuestionOption.question_id.in_([question.id for question in questions]))\
+            .order_by(QuestionOption.order, QuestionOption.id)
+        for option in options:
+            options_by_question.setdefault(option.question_id, []).append(option)
+
+    report = []
+    for question in questions:
+        option_counts = [(option, counts.get((question.id, option.id), [0, 0, 0, 0]))
+                         for option in options_by_question.get(question.id, [])]
+        skipped = counts.get((question.id, None), [0, 0, 0, 0])
+        total = sum(sum(quartiles) for _, quartiles in option_counts) + sum(skipped)
+        # Quartile comparisons are noise until every quartile has a couple of attempts
+        compare = total >= DISTRACTOR_MIN_RESPONSES
+
+        rows = []
+        for option, quartiles in option_counts:
+            if option.is_correct:
+                flag = 'Picked more by low scorers' if compare and quartiles[0] > quartiles[3] else None
+            elif total and sum(quartiles) == 0:
+                flag = 'Never picked'
+            elif compare and quartiles[3] > quartiles[0]:
+                flag = 'Picked more by high scorers'
+            else:
+                flag = None
+            rows.append({'option': option, 'quartiles': quartiles, 'total': sum(quartiles), 'flag': flag})
+        report.append({'question': question, 'options': rows, 'skipped': skipped, 'total': total})
+    return report
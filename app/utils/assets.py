@@ -0,0 +1,119 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+from flask import abort, request, send_from_directory, url_for
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:  # optional: .br files are only written when it is installed
+    brotli = None
+
+MANIFEST_NAME = 'manifest.json'
+HASH_LENGTH = 12
+COMPRESSIBLE_EXTENSIONS = {'.css', '.js', '.map', '.svg', '.json', '.txt', '.html'}
+MIN_COMPRESS_SIZE = 256  # smaller files barely shrink
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+
+def fingerprinted_name(filename, content):
+    """css/style.css -> css/style.<content hash>.css"""
+    root, extension = os.path.splitext(filename)
+    return f'{root}.{hashlib.sha256(content).hexdigest()[:HASH_LENGTH]}{extension}'
+
+
+def build_assets(static_folder, output_dir, log=print):
+    """Copy every static file to output_dir under a content-hashed name, with
+    .gz (and .br) variants of text files, and write the name manifest.
+
+    output_dir is rebuilt from scratch; it may live inside static_folder.
+    """
+    output_dir = os.path.abspath(output_dir)
+    if os.path.isdir(output_dir):
+        shutil.rmtree(output_dir)
+    manifest = {}
+    for dirpath, dirnames, filenames in os.walk(static_folder):
+        dirnames[:] = sorted(name for name in dirnames if os.path.abspath(os.path.join(dirpath, name)) != output_dir)
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            filename = os.path.relpath(path, static_folder).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                content = f.read()
+            hashed = fingerprinted_name(filename, content)
+            manifest[filename] = hashed
+            variants = {'': content}
+            if os.path.splitext(name)[1].lower() in COMPRESSIBLE_EXTENSIONS and len(content) >= MIN_COMPRESS_SIZE:
+                variants['.gz'] = gzip.compress(content, compresslevel=9, mtime=0)  # mtime=0 keeps builds reproducible
+                if brotli is not None:
+                    variants['.br'] = brotli.compress(content, quality=11)
+            target = os.path.join(output_dir, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            for suffix, data in variants.items():
+                with open(target + suffix, 'wb') as f:
+                    f.write(data)
+            log(f'{filename} -> {hashed} ' + ' '.join(f'{suffix or "raw"}:{len(data)}' for suffix, data in variants.items()))
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return manifest
+
+
+class Assets:
+    """Serves the output of `flask assets build` and resolves template asset names.
+
+    asset_url('css/style.css') returns the fingerprinted /assets/ URL when the
+    file is in the manifest and the plain /static/ URL otherwise, so a checkout
+    without a build still works. Fingerprinted files never change, so they are
+    sent with a one-year immutable Cache-Control, precompressed when the browser
+    accepts it.
+    """
+
+    def __init__(self, app=None):
+        self.directory = None
+        self.manifest = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.extensions['assets'] = self
+        self.directory = app.config['ASSETS_DIR']
+        self.manifest = self.load_manifest()
+        app.add_url_rule(app.config['ASSETS_URL_PATH'] + '/<path:filename>', 'assets', self.send_asset)
+        app.jinja_env.globals['asset_url'] = self.asset_url
+
+    def load_manifest(self):
+        try:
+            with open(os.path.join(self.directory, MANIFEST_NAME)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def asset_url(self, filename):
+        hashed = self.manifest.get(filename)
+        if hashed is None:
+            return url_for('static', filename=filename)
+        return url_for('assets', filename=hashed)
+
+    def send_asset(self, filename):
+        path = safe_join(self.directory, filename)
+        if path is None:
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        encoding = None
+        for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if request.accept_encodings[candidate] and os.path.isfile(path + suffix):
+                encoding = candidate
+                filename += suffix
+                break
+        response = send_from_directory(self.directory, filename, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+        if encoding:
+            response.content_encoding = encoding
+        response.vary.add('Accept-Encoding')
+        response.cache_control.public = True
+        response.cache_control.immutable = True
+        return response
+
+
+assets = Assets()
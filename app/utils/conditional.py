@@ -0,0 +1,54 @@
+import hashlib
+import time
+from flask import current_app, make_response, request, session
+from flask_login import current_user
+from werkzeug.http import is_resource_modified
+
+
+class ConditionalPage:
+    """ETag validator for a per-user page, checked before any rendering.
+
+    The ETag is a hash of the parts that decide the page's content, the URL and
+    the viewer: their id and name (shown in the navbar) and their session's CSRF
+    secret. Every page embeds a signed CSRF token that expires after
+    WTF_CSRF_TIME_LIMIT, so the tag also changes every half of that limit. A copy
+    revalidated from the browser cache therefore never carries an expired token.
+
+    No Last-Modified is sent: the viewer and the CSRF bucket have no timestamp,
+    and a client revalidating with If-Modified-Since alone would get a 304 for
+    a page whose ETag had changed.
+    """
+
+    def __init__(self, *parts):
+        viewer = [request.full_path, current_user.id, current_user.username, session.get('csrf_token')]
+        time_limit = current_app.config.get('WTF_CSRF_TIME_LIMIT')
+        if time_limit:
+            viewer.append(int(time.time() // (time_limit / 2)))
+        digest = hashlib.sha1(repr((parts, viewer)).encode()).hexdigest()
+        self.etag = digest[:32]
+        # Flashed messages are shown once; a cached copy would either repeat or drop them
+        self.cacheable = '_flashes' not in session
+
+    def not_modified(self):
+        """A 304 response if the browser's copy is current, otherwise None."""
+        if not self.cacheable or request.method not in ('GET', 'HEAD'):
+            return None
+        if is_resource_modified(request.environ, etag=self.etag):
+            return None
+        return self._with_validators(current_app.response_class(status=304))
+
+    def response(self, body):
+        """The rendered page, carrying the validators when it can be revalidated."""
+        response = make_response(body)
+        if self.cacheable:
+            return self._with_validators(response)
+        response.cache_control.no_store = True
+        return response
+
+    def _with_validators(self, response):
+        response.set_etag(self.etag)
+        # Only the viewer's browser may keep it, and it must ask before reusing it
+        response.cache_control.private = True
+        response.cache_control.no_cache = True
+        response.vary.add('Cookie')
+        return response
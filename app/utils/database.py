@@ -0,0 +1,39 @@
+from functools import partial
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+from app import db
+
+
+def _apply_pragmas(pragmas, dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for name, value in pragmas.items():
+        cursor.execute(f'PRAGMA {name}={value}')
+    cursor.close()
+
+
+def configure_database(app):
+    """Apply the config's pool sizing and SQLite pragmas to the app's engine.
+
+    Must run before the engine is first used. Pool sizing applies when
+    DB_POOL_SIZE is set; SQLITE_PRAGMAS run on every new pooled connection.
+    Both are left unset by the default (development) config.
+    """
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    is_sqlite = url.get_backend_name() == 'sqlite'
+    in_memory = is_sqlite and url.database in (None, '', ':memory:')
+
+    options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    if app.config.get('DB_POOL_SIZE') and not in_memory:
+        options.setdefault('pool_size', app.config['DB_POOL_SIZE'])
+        options.setdefault('max_overflow', app.config['DB_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', app.config['DB_POOL_TIMEOUT'])
+        if is_sqlite:
+            # pysqlite defaults to no pooling for files; pooled connections move between threads
+            options.setdefault('poolclass', QueuePool)
+            options['connect_args'] = dict(options.get('connect_args') or {}, check_same_thread=False)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = options
+
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if pragmas and is_sqlite:
+        event.listen(db.get_engine(app), 'connect', partial(_apply_pragmas, pragmas))
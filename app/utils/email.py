@@ -1,11 +1,15 @@
 from flask import current_app, render_template
 from flask_mail import Message
 from app import mail
+from app.utils.metrics import metrics
 from threading import Thread
 
 def send_async_email(app, msg):
-    with app.app_context():
-        mail.send(msg)
+    try:
+        with app.app_context():
+            mail.send(msg)
+    finally:
+        metrics.add_gauge('email_queue_depth', -1)
 
 def send_email(subject, sender, recipients, text_body, html_body):
     if not current_app.config.get('MAIL_SERVER'):
@@ -15,6 +19,7 @@ def send_email(subject, sender, recipients, text_body, html_body):
     msg = Message(subject, sender=sender, recipients=recipients)
     msg.body = text_body
     msg.html = html_body
+    metrics.add_gauge('email_queue_depth', 1)
     Thread(target=send_async_email,
            args=(current_app._get_current_object(), msg)).start()
 
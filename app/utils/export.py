@@ -0,0 +1,138 @@
+import csv
+import json
+import zlib
+from io import StringIO
+from flask import Response, request, stream_with_context
+from sqlalchemy import select
+from sqlalchemy.orm import aliased
+from app import db
+from app.models.quiz import Quiz, Question, QuestionOption, QuizAttempt, Answer
+from app.models.user import User
+
+# Rows per database batch and per chunk written to the response
+EXPORT_BATCH_SIZE = 1000
+
+
+def keyset_batches(statement, key_column, batch_size=EXPORT_BATCH_SIZE, key_name=None):
+    """Yield lists of rows from a Core select in key order, one bounded query per batch.
+
+    Each batch resumes after the last key seen (WHERE key > :last ORDER BY key LIMIT n),
+    so no cursor stays open between batches and memory stays flat however many
+    rows there are. key_column must be unique and selected by the statement;
+    pass key_name if it is selected under a label.
+    """
+    last_key = None
+    while True:
+        batch_statement = statement.order_by(key_column).limit(batch_size)
+        if last_key is not None:
+            batch_statement = batch_statement.where(key_column > last_key)
+        rows = db.session.execute(batch_statement).all()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < batch_size:
+            return
+        last_key = rows[-1]._mapping[key_name or key_column]
+
+
+def csv_chunks(header, batches):
+    """Encode a header and batches of rows as CSV, yielding one text chunk per batch."""
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def ndjson_chunks(batches):
+    """Encode batches of rows as newline-delimited JSON, one object per row."""
+    for rows in batches:
+        yield ''.join(json.dumps(dict(row._mapping), default=_json_default) + '\n' for row in rows)
+
+
+def _json_default(value):
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def gzip_chunks(chunks):
+    """Gzip-compress a stream of text chunks on the fly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def wants_gzip():
+    """Whether the client asked for a compressed download (?gzip=1)."""
+    return request.args.get('gzip', '').lower() in ('1', 'true', 'yes')
+
+
+def streaming_download(chunks, filename, mimetype='text/csv', compress=False):
+    """Stream generated chunks as a file download, optionally gzip-compressed."""
+    if compress:
+        chunks = gzip_chunks(chunks)
+        filename += '.gz'
+        mimetype = 'application/gzip'
+    return Response(
+        stream_with_context(chunks),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename={filename}'
+        }
+    )
+
+
+def answer_export_statement(author_id=None, category=None):
+    """Select every answer with its quiz, question, option, student and attempt details.
+
+    Optionally limited to the quizzes of one author and/or one category.
+    """
+    selected_option = aliased(QuestionOption)
+    statement = select(
+        Answer.id.label('answer_id'),
+        Quiz.id.label('quiz_id'),
+        Quiz.title.label('quiz_title'),
+        Quiz.category.label('quiz_category'),
+        Question.id.label('question_id'),
+        Question.order.label('question_order'),
+        Question.question_type,
+        Question.text.label('question_text'),
+        Question.points.label('question_points'),
+        Answer.selected_option_id,
+        selected_option.text.label('selected_option_text'),
+        Answer.text_answer,
+        Answer.is_correct,
+        Answer.points_earned,
+        QuizAttempt.id.label('attempt_id'),
+        User.id.label('student_id'),
+        User.username.label('student_username'),
+        QuizAttempt.started_at,
+        QuizAttempt.completed_at
+    ).join(QuizAttempt, QuizAttempt.id == Answer.attempt_id)\
+        .join(Quiz, Quiz.id == QuizAttempt.quiz_id)\
+        .join(Question, Question.id == Answer.question_id)\
+        .join(User, User.id == QuizAttempt.student_id)\
+        .outerjoin(selected_option, selected_option.id == Answer.selected_option_id)
+    if author_id is not None:
+        statement = statement.where(Quiz.author_id == author_id)
+    if category:
+        statement = statement.where(Quiz.category == category)
+    return statement
+
+
+def answer_export_chunks(statement, export_format='csv'):
+    """Stream the rows of an answer export as CSV or NDJSON text chunks."""
+    batches = keyset_batches(statement, Answer.id, key_name='answer_id')
+    if export_format == 'ndjson':
+        return ndjson_chunks(batches)
+    header = [column.name for column in statement.selected_columns]
+    return csv_chunks(header, batches)
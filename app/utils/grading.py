@@ -0,0 +1,193 @@
+from datetime import datetime
+from threading import Lock
+from app import db
+from sqlalchemy import select, bindparam
+from app.models.quiz import Question, QuestionOption, Answer
+from app.models.grading_job import GradingJob
+from app.models.quiz_stats import QuizStats
+
+# Compiled answer keys, one per quiz, shared by every request in this process
+_answer_keys = {}
+_answer_keys_lock = Lock()
+
+
+def normalize_answer(text):
+    """Normalize a descriptive answer: drop all whitespace and lowercase it."""
+    return ''.join(text.split()).lower() if text else ''
+
+
+class AnswerKey:
+    """Everything needed to grade one version of a quiz without touching the database."""
+
+    def __init__(self, quiz_id, version):
+        self.quiz_id = quiz_id
+        self.version = version
+        self.questions = []         # (question_id, question_type, points) in quiz order
+        self.options = {}           # question_id -> {option_id: is_correct}
+        self.descriptive_keys = {}  # question_id -> normalized correct answer
+        self.total_points = 0
+
+    @classmethod
+    def compile(cls, quiz):
+        """Build the key for a quiz from a single query over its questions and options."""
+        key = cls(quiz.id, quiz.updated_at)
+        rows = db.session.query(
+            Question.id, Question.question_type, Question.points,
+            QuestionOption.id, QuestionOption.is_correct, QuestionOption.text
+        ).outerjoin(QuestionOption, QuestionOption.question_id == Question.id)\
+            .filter(Question.quiz_id == quiz.id)\
+            .order_by(Question.order, Question.id, QuestionOption.order, QuestionOption.id)\
+            .all()
+
+        for question_id, question_type, points, option_id, is_correct, option_text in rows:
+            if question_id not in key.options:
+                key.questions.append((question_id, question_type, points or 0))
+                key.options[question_id] = {}
+                key.total_points += points or 0
+            if option_id is None:
+                continue
+            key.options[question_id][option_id] = bool(is_correct)
+            # The first option of a descriptive question holds its correct answer
+            if question_type != 'mcq' and question_id not in key.descriptive_keys:
+                key.descriptive_keys[question_id] = normalize_answer(option_text)
+        return key
+
+    def collect(self, attempt_id, responses):
+        """Turn submitted form values into ungraded answer rows (dicts), one per question."""
+        rows = []
+        for question_id, question_type, _ in self.questions:
+            value = responses.get(f'question_{question_id}')
+            if question_type == 'mcq':
+                try:
+                    option_id = int(value)
+                except (TypeError, ValueError):
+                    option_id = None
+                # Only options that belong to this question count as a selection
+                if option_id not in self.options[question_id]:
+                    option_id = None
+                rows.append({
+                    'attempt_id': attempt_id,
+                    'question_id': question_id,
+                    'selected_option_id': option_id,
+                    'text_answer': None,
+                    'is_correct': None,
+                    'points_earned': None
+                })
+            else:  # Descriptive question
+                rows.append({
+                    'attempt_id': attempt_id,
+                    'question_id': question_id,
+                    'selected_option_id': None,
+                    'text_answer': value,
+                    'is_correct': None,
+                    'points_earned': None
+                })
+        return rows
+
+    def score(self, rows):
+        """Fill in is_correct and points_earned on answer rows in place and return the total score."""
+        questions = {question_id: (question_type, points) for question_id, question_type, points in self.questions}
+        total = 0
+        for row in rows:
+            question_id = row['question_id']
+            if question_id not in questions:
+                # The question was removed after this answer was stored
+                row['is_correct'], row['points_earned'] = False, 0
+                continue
+            question_type, points = questions[question_id]
+            if question_type == 'mcq':
+                is_correct = self.options[question_id].get(row['selected_option_id'], False)
+            else:  # Descriptive question
+                is_correct = normalize_answer(row['text_answer']) == self.descriptive_keys.get(question_id, '')
+            row['is_correct'] = is_correct
+            row['points_earned'] = points if is_correct else 0
+            total += row['points_earned']
+        return total
+
+    def grade(self, attempt_id, responses):
+        """Collect and score a submission in one step."""
+        rows = self.collect(attempt_id, responses)
+        self.score(rows)
+        return rows
+
+
+def get_answer_key(quiz):
+    """Return the cached answer key for the quiz's current version, compiling it if needed."""
+    key = _answer_keys.get(quiz.id)
+    if key is not None and key.version == quiz.updated_at:
+        return key
+    key = AnswerKey.compile(quiz)
+    with _answer_keys_lock:
+        _answer_keys[quiz.id] = key
+    return key
+
+
+def invalidate_answer_key(quiz_id):
+    """Drop the cached answer key for a quiz after its questions or options change."""
+    with _answer_keys_lock:
+        _answer_keys.pop(quiz_id, None)
+
+
+def store_answers(rows):
+    """Write answer rows with a single executemany insert instead of one ORM object each."""
+    if rows:
+        db.session.execute(Answer.__table__.insert(), rows)
+
+
+def submit_attempt(attempt, quiz, responses):
+    """Grade a submission and save it: one bulk insert for the answers, one update for the attempt.
+
+    Score and max score come from the in-memory rows, so the answers are never read back.
+    """
+    answer_key = get_answer_key(quiz)
+    rows = answer_key.collect(attempt.id, responses)
+    score = answer_key.score(rows)
+    store_answers(rows)
+
+    attempt.completed_at = datetime.utcnow()
+    attempt.score = score
+    attempt.max_score = answer_key.total_points
+    QuizStats.record_attempt_completed(quiz.id, score)
+    db.session.commit()
+    return attempt
+
+
+def queue_attempt(attempt, quiz, responses):
+    """Store a submission ungraded and queue it for the grading workers.
+
+    The attempt is marked completed straight away so it cannot be submitted twice;
+    its score stays empty until a worker has graded it.
+    """
+    answer_key = get_answer_key(quiz)
+    store_answers(answer_key.collect(attempt.id, responses))
+
+    attempt.completed_at = datetime.utcnow()
+    attempt.max_score = answer_key.total_points
+    db.session.add(GradingJob(attempt_id=attempt.id))
+    QuizStats.record_attempt_completed(quiz.id)
+    db.session.commit()
+    return attempt
+
+
+def grade_stored_attempt(attempt):
+    """Grade the stored answers of a queued attempt and save the results."""
+    answer_table = Answer.__table__
+    rows = [dict(row) for row in db.session.execute(
+        select(answer_table.c.id, answer_table.c.question_id,
+               answer_table.c.selected_option_id, answer_table.c.text_answer)
+        .where(answer_table.c.attempt_id == attempt.id)
+    ).mappings()]
+
+    answer_key = get_answer_key(attempt.quiz)
+    attempt.score = answer_key.score(rows)
+    attempt.max_score = answer_key.total_points
+    if rows:
+        db.session.execute(
+            answer_table.update()
+            .where(answer_table.c.id == bindparam('answer_id'))
+            .values(is_correct=bindparam('is_correct'), points_earned=bindparam('points_earned')),
+            [{'answer_id': row['id'], 'is_correct': row['is_correct'], 'points_earned': row['points_earned']}
+             for row in rows]
+        )
+    QuizStats.record_score(attempt.quiz_id, attempt.score)
+    return attempt
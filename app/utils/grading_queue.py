@@ -0,0 +1,167 @@
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+from flask import current_app
+from sqlalchemy import and_, or_
+from app import db
+from app.models.grading_job import GradingJob
+from app.models.quiz import QuizAttempt
+from app.utils.email import send_quiz_result_email
+from app.utils.grading import grade_stored_attempt
+
+
+def claim_next_job(lease=None):
+    """Atomically move the oldest claimable job to running.
+
+    Returns (job id, claim time), or None if there is nothing to do. A job is
+    claimable when it is pending or when it has been running for longer than the
+    lease (in seconds), e.g. because the worker that claimed it died. The claim
+    time identifies the lease when the job is finished.
+    """
+    lease = lease if lease is not None else current_app.config['GRADING_JOB_TIMEOUT']
+    while True:
+        claimable = or_(GradingJob.status == GradingJob.PENDING,
+                        and_(GradingJob.status == GradingJob.RUNNING,
+                             GradingJob.started_at < datetime.utcnow() - timedelta(seconds=lease)))
+        job_id = db.session.query(GradingJob.id)\
+            .filter(claimable)\
+            .order_by(GradingJob.id)\
+            .limit(1)\
+            .scalar()
+        if job_id is None:
+            db.session.rollback()
+            return None
+        # Only one worker can win the transition; an expired lease is taken over the same way
+        claimed_at = datetime.utcnow()
+        claimed = GradingJob.query\
+            .filter(GradingJob.id == job_id, claimable)\
+            .update({'status': GradingJob.RUNNING, 'started_at': claimed_at},
+                    synchronize_session=False)
+        db.session.commit()
+        if claimed:
+            return job_id, claimed_at
+
+
+def finish_job(job_id, claimed_at, **values):
+    """Close a job in the current transaction if the lease taken at claimed_at still holds it.
+
+    Returns False if the lease expired and another worker has claimed the job since.
+    """
+    finished = GradingJob.query\
+        .filter_by(id=job_id, status=GradingJob.RUNNING, started_at=claimed_at)\
+        .update(dict(values, finished_at=datetime.utcnow()), synchronize_session=False)
+    return finished == 1
+
+
+def process_job(job_id, claimed_at):
+    """Grade the attempt behind a claimed job, then email the student their result.
+
+    The grading is only committed by the worker that still holds the job, so a
+    slow worker whose lease was taken over does not record the score a second time.
+    """
+    job = GradingJob.query.get(job_id)
+    try:
+        attempt = grade_stored_attempt(job.attempt)
+        if not finish_job(job_id, claimed_at, status=GradingJob.DONE):
+            db.session.rollback()
+            current_app.logger.warning('Grading job %s was taken over by another worker', job_id)
+            return False
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        finish_job(job_id, claimed_at, status=GradingJob.FAILED, error=str(e))
+        db.session.commit()
+        current_app.logger.exception('Grading job %s failed', job_id)
+        return False
+
+    send_quiz_result_email(attempt.student, attempt.quiz, attempt.score, attempt.max_score, attempt)
+    return True
+
+
+def has_unfinished_jobs(quiz_id):
+    """True if any attempt at the quiz is still waiting for or being graded."""
+    return db.session.query(
+        GradingJob.query
+        .join(QuizAttempt, QuizAttempt.id == GradingJob.attempt_id)
+        .filter(QuizAttempt.quiz_id == quiz_id,
+                GradingJob.status.in_([GradingJob.PENDING, GradingJob.RUNNING]))
+        .exists()
+    ).scalar()
+
+
+def grading_status(attempt):
+    """Return 'in_progress', 'pending', 'running', 'graded' or 'failed' for an attempt."""
+    if not attempt.completed_at:
+        return 'in_progress'
+    job = attempt.grading_job
+    if job is None or job.status == GradingJob.DONE:
+        return 'graded'
+    return job.status
+
+
+class GradingWorkerPool:
+    """Background threads that grade queued attempts for one app.
+
+    Threads start lazily on the first notify() so that CLI commands and
+    pre-forking servers do not spawn workers they never use. Workers poll the
+    queue table, so jobs queued by other processes are picked up as well, and
+    jobs abandoned by a crashed worker once their lease has expired.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.threads = []
+        self._wakeup = Event()
+        self._stopping = Event()
+        self._start_lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['grading_queue'] = self
+
+    def start(self, size=None):
+        with self._start_lock:
+            if self.threads:
+                return
+            size = size if size is not None else self.app.config['GRADING_WORKERS']
+            for index in range(size):
+                thread = Thread(target=self._run, name=f'grading-worker-{index}', daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def notify(self):
+        """Wake the workers after a job has been queued."""
+        if not self.threads and self.app.config['GRADING_WORKERS'] > 0:
+            self.start()
+        self._wakeup.set()
+
+    def stop(self, timeout=None):
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def _run(self):
+        poll_interval = self.app.config['GRADING_POLL_INTERVAL']
+        base_url = self.app.config['EXTERNAL_URL']
+        while not self._stopping.is_set():
+            # A request context lets the result emails build external links
+            with self.app.test_request_context(base_url=base_url):
+                try:
+                    claim = claim_next_job()
+                    if claim is not None:
+                        process_job(*claim)
+                except Exception:
+                    db.session.rollback()
+                    self.app.logger.exception('Grading worker error')
+                    claim = None
+                finally:
+                    db.session.remove()
+            if claim is None:
+                self._wakeup.wait(poll_interval)
+                self._wakeup.clear()
+
+
+grading_queue = GradingWorkerPool()
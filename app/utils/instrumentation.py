@@ -0,0 +1,115 @@
+import json
+import re
+import time
+from collections import Counter
+from flask import g, has_app_context, request
+from sqlalchemy import event
+from app import db
+from app.utils.profiler import carries_token
+
+# Placeholder lists of any length collapse to one shape: IN (?, ?, ?) -> IN (?)
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+))+\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def statement_shape(statement):
+    """Normalize SQL so the same query with different parameters has one shape."""
+    return _PLACEHOLDER_LIST.sub('(?)', _WHITESPACE.sub(' ', statement).strip())
+
+
+class RequestSQLStats:
+    """SQL statements run while handling one request."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0  # seconds
+        self.shapes = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.shapes[statement_shape(statement)] += 1
+
+    def repeated(self, threshold=1):
+        """(shape, count) pairs run more than threshold times, most repeated first."""
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+class SQLInstrumentation:
+    """Count and time every SQL statement per request.
+
+    Logs one JSON line per request and feeds the DB metrics. The
+    X-DB-Query-Count, X-DB-Time-ms and X-DB-Max-Repeats response headers expose
+    backend internals, so they are only added in debug and testing mode, with
+    SQL_DEBUG_HEADERS set, or for requests carrying the profiler token. In debug
+    and testing mode it also warns when a request runs one statement shape more
+    than SQL_REPEAT_THRESHOLD times, which almost always means an N+1 query loop.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['sql_instrumentation'] = self
+        if not app.config['SQL_INSTRUMENTATION']:
+            return
+        engine = db.get_engine(app)
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+
+    @staticmethod
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start_time', []).append(time.perf_counter())
+
+    @staticmethod
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info['query_start_time'].pop()
+        stats = g.get('sql_stats') if has_app_context() else None
+        if stats is not None:
+            stats.record(statement, duration)
+
+    @staticmethod
+    def _start_request():
+        g.sql_stats = RequestSQLStats()
+
+    def _headers_allowed(self):
+        if self.app.debug or self.app.testing or self.app.config['SQL_DEBUG_HEADERS']:
+            return True
+        token = self.app.config['PROFILER_TOKEN']
+        return bool(token) and carries_token(request.environ, token)
+
+    def _finish_request(self, response):
+        stats = g.get('sql_stats')
+        if stats is None:
+            return response
+        max_repeats = max(stats.shapes.values(), default=0)
+        if self._headers_allowed():
+            response.headers['X-DB-Query-Count'] = str(stats.count)
+            response.headers['X-DB-Time-ms'] = f'{stats.duration * 1000:.1f}'
+            response.headers['X-DB-Max-Repeats'] = str(max_repeats)
+
+        self.app.logger.info(json.dumps({
+            'event': 'sql',
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'queries': stats.count,
+            'db_ms': round(stats.duration * 1000, 1),
+            'max_repeats': max_repeats,
+        }))
+
+        threshold = self.app.config['SQL_REPEAT_THRESHOLD']
+        if (self.app.debug or self.app.testing) and max_repeats > threshold:
+            for shape, count in stats.repeated(threshold):
+                self.app.logger.warning('Possible N+1 in %s: statement ran %d times: %s',
+                                        request.endpoint, count, shape[:300])
+        return response
+
+
+sql_instrumentation = SQLInstrumentation()
@@ -0,0 +1,35 @@
+from sqlalchemy.orm import joinedload, selectinload
+from app.models.quiz import Quiz, Question, QuizAttempt, Answer
+
+# Eager-loading options for each way a quiz is rendered. Each profile loads
+# everything its template touches in a fixed number of queries (one per
+# level), however many questions the quiz has.
+LOADER_PROFILES = {
+    # quiz/take.html: questions and their options, in order
+    'take': (
+        selectinload(Quiz.questions).selectinload(Question.options),
+    ),
+    # quiz/edit.html and the edit form: the same, plus the identity map then
+    # answers the per-question and per-option lookups made while saving
+    'edit': (
+        selectinload(Quiz.questions).selectinload(Question.options),
+    ),
+    # An attempt with its quiz: enough to check permissions and page validators
+    # before deciding whether 'review' is needed
+    'attempt': (
+        joinedload(QuizAttempt.quiz),
+    ),
+    # quiz/detailed_results.html: an attempt with its quiz, answers, and each
+    # answer's question and options
+    'review': (
+        joinedload(QuizAttempt.quiz),
+        selectinload(QuizAttempt.answers).joinedload(Answer.question).selectinload(Question.options),
+    ),
+}
+
+
+def with_profile(query, profile):
+    """Apply a loader profile to a query; profile None leaves it unchanged."""
+    if profile is None:
+        return query
+    return query.options(*LOADER_PROFILES[profile])
@@ -0,0 +1,312 @@
+import glob
+import hmac
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import defaultdict
+from threading import Lock
+from flask import Response, abort, current_app, g, request
+from app import db
+
+try:
+    import fcntl
+except ImportError:  # Windows: per-process files are still summed, just never compacted
+    fcntl = None
+
+# Prefix of every exported metric name
+PREFIX = 'quizwizz_'
+
+# Upper bounds (seconds) of the histogram buckets; a final +Inf bucket is implied
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name: (type, help text), in the order they are exported
+METRICS = {
+    'http_requests_total': ('counter', 'Requests handled, by endpoint, method and status code.'),
+    'http_request_duration_seconds': ('histogram', 'Time to build the response, by endpoint.'),
+    'db_time_seconds': ('histogram', 'Time spent in SQL statements per request, by endpoint.'),
+    'db_queries_total': ('counter', 'SQL statements run by requests, by endpoint.'),
+    'render_cache_requests_total': ('counter', 'Rendered fragment cache lookups, by cache and result.'),
+    'email_queue_depth': ('gauge', 'Emails handed to a sender thread and not yet sent.'),
+    'grading_queue_depth': ('gauge', 'Grading jobs waiting or being graded, by status.'),
+}
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_number(value):
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+# Totals of exited worker processes, folded together so their files do not pile up
+ARCHIVE_NAME = 'metrics-archive.json'
+LOCK_NAME = '.metrics.lock'
+
+
+def _snapshot(pid, counters, gauges, histograms):
+    """Values keyed by (name, labels) in the JSON-serializable form written to METRICS_DIR."""
+    return {
+        'pid': pid,
+        'counters': [[name, labels, value] for (name, labels), value in counters.items()],
+        'gauges': [[name, labels, value] for (name, labels), value in gauges.items()],
+        'histograms': [[name, labels, list(buckets), total, count]
+                       for (name, labels), (buckets, total, count) in histograms.items()],
+    }
+
+
+def _merge(snapshots):
+    """Add up snapshots; gauges only count processes that are still running."""
+    counters, gauges, histograms = defaultdict(float), defaultdict(float), {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            counters[name, tuple(map(tuple, labels))] += value
+        if snapshot['gauges'] and (snapshot['pid'] == os.getpid() or _pid_alive(snapshot['pid'])):
+            for name, labels, value in snapshot['gauges']:
+                gauges[name, tuple(map(tuple, labels))] += value
+        for name, labels, buckets, total, count in snapshot['histograms']:
+            key = name, tuple(map(tuple, labels))
+            merged = histograms.setdefault(key, [[0] * len(buckets), 0.0, 0])
+            merged[0] = [a + b for a, b in zip(merged[0], buckets)]
+            merged[1] += total
+            merged[2] += count
+    return counters, gauges, histograms
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None  # removed or replaced while listing
+
+
+def _write_json(path, data):
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(temp_path, path)  # readers never see a half-written file
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class MetricsRegistry:
+    """Request counters, latency histograms and queue gauges, exported on /metrics.
+
+    Values live in this process. With METRICS_DIR set, every process also
+    writes its values to its own file in that directory (at most every
+    METRICS_FLUSH_INTERVAL seconds, and whenever it serves /metrics), and
+    /metrics adds up the files of all worker processes. Files of exited
+    processes are folded into one archive file, so counters and histograms
+    never go backwards while the directory stays small; gauges only count
+    processes that are still running.
+
+    /metrics requires METRICS_TOKEN as a bearer token. Without one it is only
+    served in debug and testing mode.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self._lock = Lock()
+        self._reset()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['metrics'] = self
+        if not app.config['METRICS_ENABLED']:
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule('/metrics', 'metrics', self._metrics_view)
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._file_id = f'{self._pid}-{int(time.time() * 1000)}'
+        self._last_flush = 0.0
+        self.counters = defaultdict(float)
+        self.gauges = defaultdict(float)
+        self.histograms = {}
+
+    def _check_fork(self):
+        # A forked worker starts with its own empty values and file
+        if os.getpid() != self._pid:
+            self._reset()
+
+    def inc(self, name, amount=1, **labels):
+        with self._lock:
+            self._check_fork()
+            self.counters[name, _label_key(labels)] += amount
+
+    def add_gauge(self, name, amount, **labels):
+        with self._lock:
+            self._check_fork()
+            self.gauges[name, _label_key(labels)] += amount
+
+    def observe(self, name, value, **labels):
+        with self._lock:
+            self._check_fork()
+            key = name, _label_key(labels)
+            if key not in self.histograms:
+                self.histograms[key] = [[0] * (len(LATENCY_BUCKETS) + 1), 0.0, 0]
+            histogram = self.histograms[key]
+            histogram[0][bisect_left(LATENCY_BUCKETS, value)] += 1
+            histogram[1] += value
+            histogram[2] += 1
+
+    def snapshot(self):
+        """This process's values in a JSON-serializable form."""
+        with self._lock:
+            self._check_fork()
+            return _snapshot(self._pid, self.counters, self.gauges, self.histograms)
+
+    def flush(self, directory):
+        """Write this process's snapshot to its file in directory."""
+        os.makedirs(directory, exist_ok=True)
+        _write_json(os.path.join(directory, f'metrics-{self._file_id}.json'), self.snapshot())
+        self._last_flush = time.monotonic()
+
+    def compact(self, directory):
+        """Fold the files of exited processes into the archive file and delete them.
+
+        Skipped if another process is already compacting. Readers hold a shared
+        lock, so they never see a process counted both in the archive and its own file.
+        Without fcntl there is no such lock, so the files are left alone.
+        """
+        if fcntl is None:
+            return
+        archive_path = os.path.join(directory, ARCHIVE_NAME)
+        with open(os.path.join(directory, LOCK_NAME), 'a') as lock:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return
+            try:
+                exited = []
+                for path in glob.glob(os.path.join(directory, 'metrics-*.json')):
+                    snapshot = _read_snapshot(path)
+                    if path != archive_path and snapshot is not None and \
+                            snapshot['pid'] != os.getpid() and not _pid_alive(snapshot['pid']):
+                        exited.append((path, snapshot))
+                if not exited:
+                    return
+                archive = _read_snapshot(archive_path) or _snapshot(None, {}, {}, {})
+                counters, _, histograms = _merge([archive] + [snapshot for _, snapshot in exited])
+                _write_json(archive_path, _snapshot(None, counters, {}, histograms))
+                for path, _ in exited:
+                    os.remove(path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def collect(self, directory=None):
+        """Add up the snapshots of every process (just this one without a directory)."""
+        if not directory:
+            return _merge([self.snapshot()])
+        self.flush(directory)
+        self.compact(directory)
+        paths = os.path.join(directory, 'metrics-*.json')
+        if fcntl is None:
+            snapshots = [_read_snapshot(path) for path in glob.glob(paths)]
+        else:
+            with open(os.path.join(directory, LOCK_NAME), 'a') as lock:
+                fcntl.flock(lock, fcntl.LOCK_SH)
+                try:
+                    snapshots = [_read_snapshot(path) for path in glob.glob(paths)]
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        return _merge(snapshot for snapshot in snapshots if snapshot is not None)
+
+    def render(self, directory=None):
+        """All metrics in the Prometheus text exposition format."""
+        counters, gauges, histograms = self.collect(directory)
+        gauges.setdefault(('email_queue_depth', ()), 0)
+        gauges.update(grading_queue_gauges())
+        lines = []
+        for name, (kind, help_text) in METRICS.items():
+            full_name = PREFIX + name
+            lines.append(f'# HELP {full_name} {help_text}')
+            lines.append(f'# TYPE {full_name} {kind}')
+            if kind == 'histogram':
+                for (metric, labels), (buckets, total, count) in sorted(histograms.items()):
+                    if metric != name:
+                        continue
+                    cumulative = 0
+                    for bound, bucket_count in zip(LATENCY_BUCKETS + (None,), buckets):
+                        cumulative += bucket_count
+                        le = '+Inf' if bound is None else format(bound, 'g')
+                        lines.append(f'{full_name}_bucket{_format_labels(labels, le=le)} {cumulative}')
+                    lines.append(f'{full_name}_sum{_format_labels(labels)} {_format_number(total)}')
+                    lines.append(f'{full_name}_count{_format_labels(labels)} {count}')
+            else:
+                values = counters if kind == 'counter' else gauges
+                for (metric, labels), value in sorted(values.items()):
+                    if metric == name:
+                        lines.append(f'{full_name}{_format_labels(labels)} {_format_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+    @staticmethod
+    def _start_request():
+        g.metrics_started = time.perf_counter()
+
+    def _finish_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None or request.endpoint == 'metrics':
+            return response
+        endpoint = request.endpoint or 'unmatched'
+        self.inc('http_requests_total', endpoint=endpoint, method=request.method,
+                 status=response.status_code)
+        self.observe('http_request_duration_seconds', time.perf_counter() - started, endpoint=endpoint)
+        sql_stats = g.get('sql_stats')  # set by the SQL instrumentation when it is enabled
+        if sql_stats is not None:
+            self.observe('db_time_seconds', sql_stats.duration, endpoint=endpoint)
+            self.inc('db_queries_total', sql_stats.count, endpoint=endpoint)
+
+        directory = current_app.config['METRICS_DIR']
+        if directory and time.monotonic() - self._last_flush >= current_app.config['METRICS_FLUSH_INTERVAL']:
+            try:
+                self.flush(directory)
+            except OSError:
+                current_app.logger.exception('Could not write metrics to %s', directory)
+        return response
+
+    def _metrics_view(self):
+        token = current_app.config['METRICS_TOKEN']
+        if token:
+            supplied = request.headers.get('Authorization', '')
+            if not hmac.compare_digest(supplied.encode(), f'Bearer {token}'.encode()):
+                abort(403)
+        elif not (current_app.debug or current_app.testing):
+            abort(404)  # not published until a scrape token is configured
+        body = self.render(current_app.config['METRICS_DIR'])
+        return Response(body, mimetype='text/plain', headers={'Cache-Control': 'no-store'})
+
+
+def grading_queue_gauges():
+    """Pending and running grading jobs, read from the shared queue table."""
+    from app.models.grading_job import GradingJob
+    counts = dict(db.session.query(GradingJob.status, db.func.count(GradingJob.id))
+                  .filter(GradingJob.status.in_([GradingJob.PENDING, GradingJob.RUNNING]))
+                  .group_by(GradingJob.status).all())
+    return {('grading_queue_depth', (('status', status),)): counts.get(status, 0)
+            for status in (GradingJob.PENDING, GradingJob.RUNNING)}
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,98 @@
+import base64
+import json
+from datetime import datetime
+from flask import request
+from sqlalchemy import literal, tuple_
+
+# Rows per page on list pages
+PER_PAGE = 20
+
+
+class KeysetPage:
+    """One page of a keyset-paginated query, with cursors for the neighbouring pages."""
+
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+def encode_cursor(direction, values):
+    """Pack a direction ('next' or 'prev') and the sort key of a row into a URL-safe token."""
+    payload = [direction] + [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, columns):
+    """Unpack a cursor token, returning (direction, values) or None if it is not valid."""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        # Anything but [direction, *one scalar per sort column] is a forged or corrupt token
+        if not isinstance(payload, list) or len(payload) != len(columns) + 1:
+            return None
+        direction, values = payload[0], payload[1:]
+        if direction not in ('next', 'prev') or any(isinstance(value, (list, dict)) for value in values):
+            return None
+        return direction, [
+            datetime.fromisoformat(value) if value is not None and column.type.python_type is datetime else value
+            for column, value in zip(columns, values)
+        ]
+    except (ValueError, TypeError, IndexError, NotImplementedError):
+        return None
+
+
+def keyset_paginate(query, columns, cursor=None, per_page=PER_PAGE):
+    """Return a newest-first KeysetPage of an ORM query, seeking past the cursor.
+
+    columns is the sort key, e.g. (Quiz.created_at, Quiz.id); it must end in a
+    unique column and be selected by the query's entity. Each page is one
+    indexed range scan of per_page + 1 rows however deep it is, unlike OFFSET.
+    """
+    key = tuple_(*columns)
+    decoded = decode_cursor(cursor, columns) if cursor else None
+    direction, values = decoded if decoded else ('next', None)
+    if values is not None:
+        # Bind with the columns' types so datetimes compare in their stored format
+        values = tuple_(*[literal(value, type_=column.type) for column, value in zip(columns, values)])
+
+    if direction == 'next':
+        if values is not None:
+            query = query.filter(key < values)
+        rows = query.order_by(*[column.desc() for column in columns]).limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        items = rows[:per_page]
+        has_next, has_prev = has_more, values is not None
+    else:
+        query = query.filter(key > values)
+        rows = query.order_by(*[column.asc() for column in columns]).limit(per_page + 1).all()
+        has_more = len(rows) > per_page
+        items = list(reversed(rows[:per_page]))
+        has_next, has_prev = True, has_more
+
+    def row_key(item):
+        return [getattr(item, column.key) for column in columns]
+
+    return KeysetPage(
+        items,
+        next_cursor=encode_cursor('next', row_key(items[-1])) if items and has_next else None,
+        prev_cursor=encode_cursor('prev', row_key(items[0])) if items and has_prev else None
+    )
+
+
+def page_from_request(query, columns, per_page=PER_PAGE):
+    """keyset_paginate using the ?cursor= argument of the current request."""
+    return keyset_paginate(query, columns, request.args.get('cursor'), per_page)
@@ -0,0 +1,97 @@
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import time
+from urllib.parse import parse_qs
+
+# Request header or query argument that carries the profiler token
+PROFILE_HEADER = 'X-Profile'
+PROFILE_ARG = '_profile'
+
+
+def carries_token(environ, token):
+    """Whether the request supplies token in the X-Profile header or the ?_profile= argument."""
+    supplied = environ.get('HTTP_X_PROFILE')
+    if supplied is None and PROFILE_ARG in environ.get('QUERY_STRING', ''):
+        supplied = parse_qs(environ['QUERY_STRING']).get(PROFILE_ARG, [None])[0]
+    return supplied is not None and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+class RequestProfiler:
+    """WSGI middleware that runs a single request under cProfile on demand.
+
+    A request is profiled only when it carries PROFILER_TOKEN in the
+    X-Profile header or the ?_profile= argument. With PROFILER_DIR set the
+    profile is written there (load it with pstats or snakeviz) and the normal
+    response is returned with an X-Profile-File header; otherwise the
+    response is replaced by a plain-text summary of the slowest functions.
+    """
+
+    def __init__(self, wsgi_app, token, output_dir=None, top=40):
+        self.wsgi_app = wsgi_app
+        self.token = token
+        self.output_dir = output_dir
+        self.top = top
+
+    def __call__(self, environ, start_response):
+        if not carries_token(environ, self.token):
+            return self.wsgi_app(environ, start_response)
+
+        captured = {}
+
+        def capture_response(status, headers, exc_info=None):
+            captured['status'], captured['headers'] = status, headers
+            return lambda data: captured.setdefault('written', []).append(data)
+
+        profile = cProfile.Profile()
+        started = time.perf_counter()
+        profile.enable()
+        try:
+            app_iter = self.wsgi_app(environ, capture_response)
+            try:
+                # Consume the body inside the profile so streamed responses are included
+                body = captured.get('written', []) + list(app_iter)
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+        finally:
+            profile.disable()
+        elapsed_ms = (time.perf_counter() - started) * 1000
+
+        if self.output_dir:
+            path = self._dump(profile, environ, elapsed_ms)
+            headers = [(name, value) for name, value in captured['headers'] if name.lower() != 'content-length']
+            headers.append(('X-Profile-File', os.path.basename(path)))
+            start_response(captured['status'], headers)
+            return body
+
+        summary = io.StringIO()
+        summary.write(f'{environ["REQUEST_METHOD"]} {environ.get("PATH_INFO", "")} -> {captured["status"]} '
+                      f'in {elapsed_ms:.1f} ms\n\n')
+        pstats.Stats(profile, stream=summary).sort_stats('cumulative').print_stats(self.top)
+        output = summary.getvalue().encode()
+        start_response('200 OK', [('Content-Type', 'text/plain; charset=utf-8'),
+                                  ('Content-Length', str(len(output))),
+                                  ('Cache-Control', 'no-store')])
+        return [output]
+
+    def _dump(self, profile, environ, elapsed_ms):
+        os.makedirs(self.output_dir, exist_ok=True)
+        path_name = environ.get('PATH_INFO', '/').strip('/').replace('/', '.') or 'root'
+        filename = '{}.{}.{:.0f}ms.{}.prof'.format(environ['REQUEST_METHOD'], path_name, elapsed_ms,
+                                                  int(time.time() * 1000))
+        path = os.path.join(self.output_dir, filename)
+        profile.dump_stats(path)
+        return path
+
+
+def init_profiler(app):
+    """Wrap the app in RequestProfiler if PROFILER_TOKEN is set; otherwise do nothing."""
+    token = app.config.get('PROFILER_TOKEN')
+    if not token:
+        return
+    app.wsgi_app = RequestProfiler(app.wsgi_app, token,
+                                   output_dir=app.config.get('PROFILER_DIR'),
+                                   top=app.config.get('PROFILER_TOP_FUNCTIONS', 40))
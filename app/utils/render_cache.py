@@ -0,0 +1,112 @@
+import os
+import re
+from collections import OrderedDict
+from threading import Lock
+from app.utils.metrics import metrics
+
+_UNSAFE_FILENAME = re.compile(r'[^A-Za-z0-9_.]')
+
+
+class FragmentCache:
+    """Rendered HTML fragments that are the same for every user, e.g. a quiz's question list.
+
+    Keys are tuples such as ('take', quiz.id, quiz.updated_at): including the
+    version means an edited quiz simply misses and re-renders, in every
+    process. Entries live in a size-bounded LRU in memory; with RENDER_CACHE_DIR
+    set they are also written there so other worker processes can reuse them.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.max_entries = 0
+        self.max_bytes = 0
+        self.directory = None
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        app.extensions['fragment_cache'] = self
+        self.max_entries = app.config['RENDER_CACHE_ENTRIES']
+        self.max_bytes = app.config['RENDER_CACHE_BYTES']
+        self.directory = app.config['RENDER_CACHE_DIR']
+        self.clear()
+
+    def _path(self, key):
+        return os.path.join(self.directory, '-'.join(_UNSAFE_FILENAME.sub('_', str(part)) for part in key) + '.html')
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+        if self.directory:
+            try:
+                with open(self._path(key), encoding='utf-8') as f:
+                    value = f.read()
+            except OSError:
+                return None
+            self._remember(key, value)
+        return value
+
+    def set(self, key, value):
+        self._remember(key, value)
+        if self.directory:
+            path = self._path(key)
+            temp_path = f'{path}.{os.getpid()}.tmp'
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    f.write(value)
+                os.replace(temp_path, path)  # readers never see a half-written file
+            except OSError:
+                self.app.logger.exception('Could not write %s', path)
+
+    def _remember(self, key, value):
+        if len(value) > self.max_bytes or self.max_entries <= 0:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._size -= len(self._entries.pop(key))
+            self._entries[key] = value
+            self._size += len(value)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def get_or_render(self, key, render):
+        """Return the cached fragment for key, calling render() to build it on a miss."""
+        if self.max_entries <= 0:
+            return render()
+        value = self.get(key)
+        metrics.inc('render_cache_requests_total', cache=key[0], result='miss' if value is None else 'hit')
+        if value is None:
+            value = render()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, *prefix):
+        """Drop every entry whose key starts with prefix, e.g. invalidate('take', quiz_id)."""
+        with self._lock:
+            for key in [key for key in self._entries if key[:len(prefix)] == prefix]:
+                self._size -= len(self._entries.pop(key))
+        if self.directory and os.path.isdir(self.directory):
+            name_prefix = '-'.join(_UNSAFE_FILENAME.sub('_', str(part)) for part in prefix) + '-'
+            for name in os.listdir(self.directory):
+                if name.startswith(name_prefix):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except OSError:
+                        pass  # already removed by another process
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+
+fragment_cache = FragmentCache()
@@ -0,0 +1,150 @@
+import re
+from datetime import datetime
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+from app import db
+from app.models.quiz import Quiz, Question, QuestionOption, QuizAttempt, Answer, QuizFeedback
+from app.models.user import User
+
+# One row per applied migration
+schema_migrations = db.Table('schema_migrations',
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('description', db.String(200), nullable=False),
+    db.Column('applied_at', db.DateTime, default=datetime.utcnow)
+)
+
+
+def _create_tables(connection):
+    db.Model.metadata.create_all(bind=connection)
+
+
+def _create_search_index(connection):
+    from app.utils.search import create_search_index, reindex_quizzes
+    if create_search_index(connection):
+        reindex_quizzes(connection)
+
+
+def _create_hot_path_indexes(connection):
+    for model in (Quiz, Question, QuestionOption, QuizAttempt, Answer, QuizFeedback):
+        for index in model.__table__.indexes:
+            index.create(bind=connection, checkfirst=True)
+
+
+def _backfill_quiz_stats(connection):
+    from app.models.quiz_stats import QuizStats
+    connection.execute(QuizStats.insert_missing())
+
+
+# (version, description, upgrade function) in the order they must run.
+# Every step is idempotent so that databases created by older releases
+# (which already have some of the tables) can be upgraded in place.
+MIGRATIONS = [
+    (1, 'Create tables', _create_tables),
+    (2, 'Quiz full-text search index', _create_search_index),
+    (3, 'Indexes for hot query paths', _create_hot_path_indexes),
+    (4, 'Backfill quiz statistics', _backfill_quiz_stats),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(connection):
+    """Return the schema version of the database, 0 if it has never been migrated."""
+    if not db.inspect(connection).has_table(schema_migrations.name):
+        return 0
+    return connection.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+
+
+def upgrade(engine, log=print):
+    """Apply every pending migration, each in its own transaction. Returns the new version."""
+    with engine.begin() as connection:
+        schema_migrations.create(bind=connection, checkfirst=True)
+        version = current_version(connection)
+    for migration_version, description, apply in MIGRATIONS:
+        if migration_version <= version:
+            continue
+        with engine.begin() as connection:
+            apply(connection)
+            connection.execute(schema_migrations.insert().values(
+                version=migration_version, description=description, applied_at=datetime.utcnow()))
+        log(f'Applied migration {migration_version}: {description}')
+        version = migration_version
+    return version
+
+
+# Database URLs whose schema version this process has already checked
+_checked_databases = set()
+
+
+def check_schema_version(app):
+    """Warn if the app's database is behind the latest migration.
+
+    Costs one short query, once per database per process, so workers and CLI
+    calls start without creating or inspecting tables.
+    """
+    url = app.config['SQLALCHEMY_DATABASE_URI']
+    if url in _checked_databases:
+        return
+    _checked_databases.add(url)
+    with app.app_context():
+        with db.engine.connect() as connection:
+            try:
+                version = connection.execute(select(func.max(schema_migrations.c.version))).scalar() or 0
+            except OperationalError:
+                version = 0  # no schema_migrations table yet
+    if version < LATEST_VERSION:
+        app.logger.warning('Database schema is at version %s, latest is %s. Run `flask schema upgrade`.',
+                           version, LATEST_VERSION)
+
+
+def hot_queries():
+    """(name, statement) pairs for the queries the request handlers run most often."""
+    quiz_id, user_id, attempt_id, question_id = 1, 1, 1, 1
+    return [
+        ('attempts of a quiz', select(QuizAttempt).where(QuizAttempt.quiz_id == quiz_id)
+            .order_by(QuizAttempt.started_at.desc(), QuizAttempt.id.desc()).limit(21)),
+        ('attempts of a student', select(QuizAttempt).where(QuizAttempt.student_id == user_id)
+            .order_by(QuizAttempt.started_at.desc(), QuizAttempt.id.desc()).limit(21)),
+        ("student's attempts at a quiz", select(QuizAttempt).where(
+            QuizAttempt.quiz_id == quiz_id, QuizAttempt.student_id == user_id)),
+        ('answers of an attempt', select(Answer).where(Answer.attempt_id == attempt_id)),
+        ('answer to a question', select(Answer).where(
+            Answer.attempt_id == attempt_id, Answer.question_id == question_id)),
+        ('questions of a quiz', select(Question).where(Question.quiz_id == quiz_id)
+            .order_by(Question.order)),
+        ('options of a question', select(QuestionOption).where(QuestionOption.question_id == question_id)
+            .order_by(QuestionOption.order)),
+        ('answer key', select(Question.id, QuestionOption.id, QuestionOption.is_correct)
+            .outerjoin(QuestionOption, QuestionOption.question_id == Question.id)
+            .where(Question.quiz_id == quiz_id)),
+        ('question answer counts', select(Answer.question_id, func.count())
+            .join(QuizAttempt, QuizAttempt.id == Answer.attempt_id)
+            .where(QuizAttempt.quiz_id == quiz_id).group_by(Answer.question_id)),
+        ("teacher's quizzes", select(Quiz).where(Quiz.author_id == user_id)
+            .order_by(Quiz.created_at.desc(), Quiz.id.desc()).limit(21)),
+        ('public quizzes', select(Quiz).where(Quiz.is_public == True)
+            .order_by(Quiz.created_at.desc(), Quiz.id.desc()).limit(21)),
+        ('feedback for a quiz', select(QuizFeedback).where(QuizFeedback.quiz_id == quiz_id)),
+        ('user by username', select(User).where(User.username == 'name')),
+    ]
+
+
+# A plan step that reads a whole table without an index, e.g. "SCAN quiz_attempts"
+_FULL_SCAN = re.compile(r'^SCAN (\w+)$')
+
+
+def full_table_scans(connection):
+    """Run EXPLAIN QUERY PLAN on every hot query; return [(name, plan step)] for full scans.
+
+    Only meaningful on SQLite, whose plans name full scans explicitly.
+    """
+    scans = []
+    for name, statement in hot_queries():
+        compiled = statement.compile(dialect=connection.dialect)
+        params = tuple(compiled.params[key] for key in compiled.positiontup)
+        for row in connection.exec_driver_sql('EXPLAIN QUERY PLAN ' + str(compiled), params):
+            step = row[-1]
+            match = _FULL_SCAN.match(step)
+            if match and match.group(1) in db.Model.metadata.tables:
+                scans.append((name, step))
+    return scans
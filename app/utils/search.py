@@ -0,0 +1,160 @@
+import re
+from sqlalchemy import bindparam, case, column, event, inspect, literal_column, or_, select, table, text
+from app import db
+from app.models.quiz import Quiz, Question
+
+# Results per search page
+SEARCH_PAGE_SIZE = 12
+
+# FTS5 index over each quiz's title, description, category and question text.
+# The rowid of every index row is the quiz id.
+SEARCH_TABLE = 'quiz_search'
+quiz_search = table(SEARCH_TABLE, column('rowid'), column('title'), column('description'),
+                    column('category'), column('questions'))
+
+# bm25 weights per indexed column: a hit in the title counts most
+RANK_WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+
+_CREATE_INDEX = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE}
+USING fts5(title, description, category, questions,
+           tokenize='unicode61 remove_diacritics 2', prefix='2 3')
+"""
+
+_INDEX_QUIZZES = f"""
+INSERT INTO {SEARCH_TABLE} (rowid, title, description, category, questions)
+SELECT quizzes.id, quizzes.title, coalesce(quizzes.description, ''), coalesce(quizzes.category, ''),
+       coalesce(question_text.questions, '')
+FROM quizzes
+LEFT OUTER JOIN (SELECT quiz_id, group_concat(text, ' ') AS questions FROM questions
+                 {{questions_filter}} GROUP BY quiz_id) AS question_text
+    ON question_text.quiz_id = quizzes.id
+{{quizzes_filter}}
+"""
+
+# Attributes whose changes require a quiz to be reindexed
+_INDEXED_ATTRIBUTES = {Quiz: ('title', 'description', 'category'), Question: ('text', 'quiz_id')}
+
+# Per engine: True if the FTS5 index exists, False to fall back to LIKE
+_fts_enabled = {}
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+
+def create_search_index(connection):
+    """Create the FTS5 index if the database supports it. Returns True on success."""
+    _fts_enabled.pop(connection.engine, None)
+    if connection.dialect.name != 'sqlite':
+        return False
+    try:
+        connection.execute(text(_CREATE_INDEX))
+    except Exception:
+        # SQLite built without FTS5
+        return False
+    return True
+
+
+def fts_enabled(connection):
+    """Whether searches on this connection's database can use the FTS5 index."""
+    engine = connection.engine
+    if engine not in _fts_enabled:
+        _fts_enabled[engine] = connection.dialect.name == 'sqlite' and connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {'name': SEARCH_TABLE}
+        ).first() is not None
+    return _fts_enabled[engine]
+
+
+def reindex_quizzes(connection, quiz_ids=None):
+    """Rewrite the index rows of the given quizzes, or of every quiz if quiz_ids is None."""
+    if not fts_enabled(connection):
+        return
+    if quiz_ids is None:
+        connection.execute(text(f'DELETE FROM {SEARCH_TABLE}'))
+        connection.execute(text(_INDEX_QUIZZES.format(questions_filter='', quizzes_filter='')))
+        return
+    quiz_ids = sorted(quiz_ids)
+    if not quiz_ids:
+        return
+    # Deleted quizzes are simply not re-inserted
+    connection.execute(quiz_search.delete().where(quiz_search.c.rowid.in_(quiz_ids)))
+    statement = _INDEX_QUIZZES.format(questions_filter='WHERE quiz_id IN :ids',
+                                      quizzes_filter='WHERE quizzes.id IN :ids')
+    connection.execute(text(statement).bindparams(bindparam('ids', expanding=True)), {'ids': quiz_ids})
+
+
+def rebuild_search_index():
+    """Create the index if needed and fill it from scratch. Returns True if FTS5 is in use."""
+    connection = db.session.connection()
+    if not create_search_index(connection):
+        return False
+    reindex_quizzes(connection)
+    db.session.commit()
+    return True
+
+
+@event.listens_for(db.session, 'after_flush')
+def _sync_search_index(session, flush_context):
+    """Keep the index in step with quizzes and questions written through the ORM.
+
+    Runs inside the flush's transaction, so a rollback also undoes the index change.
+    """
+    quiz_ids = set()
+    changed = [obj for obj in session.dirty if _indexed_change(obj)]
+    for obj in list(session.new) + changed + list(session.deleted):
+        if isinstance(obj, Quiz):
+            quiz_ids.add(obj.id)
+        elif isinstance(obj, Question):
+            quiz_ids.add(obj.quiz_id if obj.quiz_id is not None else getattr(obj.quiz, 'id', None))
+    quiz_ids.discard(None)
+    if quiz_ids:
+        reindex_quizzes(session.connection(), quiz_ids)
+
+
+def _indexed_change(obj):
+    attributes = _INDEXED_ATTRIBUTES.get(type(obj), ())
+    state = inspect(obj)
+    return any(state.attrs[name].history.has_changes() for name in attributes)
+
+
+def match_expression(terms):
+    """Build an FTS5 query that requires every term, each matched as a prefix."""
+    return ' '.join('"{}"*'.format(term) for term in _TERM.findall(terms))
+
+
+def public_quizzes(category=None):
+    """Query for public quizzes, optionally in one category."""
+    query = Quiz.query.filter(Quiz.is_public == True)
+    if category:
+        query = query.filter(Quiz.category == category)
+    return query
+
+
+def search_query(terms, category=None):
+    """Return a Quiz query for public quizzes matching the search terms, best matches first.
+
+    Uses the FTS5 index ranked by bm25 when available; otherwise every term
+    must appear (case-insensitively) in the title, description, category or
+    a question, and title matches are listed first.
+    """
+    query = public_quizzes(category)
+    words = _TERM.findall(terms or '')
+    if not words:
+        return query.order_by(Quiz.created_at.desc(), Quiz.id.desc())
+
+    if fts_enabled(db.session.connection()):
+        rank = literal_column('bm25({}, {})'.format(SEARCH_TABLE, ', '.join(map(str, RANK_WEIGHTS))))
+        return query.join(quiz_search, quiz_search.c.rowid == Quiz.id)\
+            .filter(literal_column(SEARCH_TABLE).op('MATCH')(match_expression(terms)))\
+            .order_by(rank, Quiz.id.desc())
+
+    for word in words:
+        pattern = f'%{word}%'
+        query = query.filter(or_(
+            Quiz.title.ilike(pattern),
+            Quiz.description.ilike(pattern),
+            Quiz.category.ilike(pattern),
+            Quiz.id.in_(select(Question.quiz_id).where(Question.text.ilike(pattern)))
+        ))
+    title_match = case((Quiz.title.ilike(f'%{words[0]}%'), 0), else_=1)
+    return query.order_by(title_match, Quiz.created_at.desc(), Quiz.id.desc())
@@ -0,0 +1,264 @@
+import random
+from datetime import datetime, timedelta
+from itertools import accumulate
+from werkzeug.security import generate_password_hash
+from app import db
+from app.forms.quiz import QUIZ_CATEGORIES
+from app.models.quiz import Quiz, Question, QuestionOption, QuizAttempt, Answer
+from app.models.quiz_stats import QuizStats
+from app.models.user import User, shared_quizzes
+
+# Preset sizes for `flask seed --scale`; 'questions' is the mean per quiz
+SCALES = {
+    'small': dict(teachers=20, students=1000, quizzes=500, attempts=20000, questions=10),
+    'medium': dict(teachers=100, students=10000, quizzes=4000, attempts=200000, questions=15),
+    'large': dict(teachers=500, students=50000, quizzes=20000, attempts=2000000, questions=25),
+}
+
+# Rows per bulk INSERT (and per commit while writing attempts and answers)
+BATCH_SIZE = 50000
+
+# End of the activity window unless one is given. A fixed date (not today) keeps
+# a seed reproducible from one day to the next, and with it the stored benchmark baselines.
+DEFAULT_UNTIL = datetime(2026, 1, 1)
+
+# Every seeded account can log in with this password
+SEED_PASSWORD = 'password'
+
+WORDS = ('algebra geometry calculus physics chemistry biology history geography literature grammar '
+         'vocabulary programming python databases networks astronomy economics statistics probability '
+         'music painting anatomy genetics ecology volcano ocean river mountain empire revolution '
+         'equation molecule electron planet galaxy climate poetry novel marketing finance nutrition '
+         'football tennis sculpture theatre algorithm compiler medicine fractions energy').split()
+WRONG_ANSWERS = ('not sure', 'I do not know', 'maybe', 'none of these', 'skip')
+
+# Answer rows are generated as tuples in this column order
+ANSWER_COLUMNS = ('attempt_id', 'question_id', 'selected_option_id', 'text_answer', 'is_correct', 'points_earned')
+
+
+def _zipf_cum_weights(count, skew, rng):
+    """Cumulative Zipf weights over count items in a random order (a few items get most of the mass)."""
+    ranks = list(range(1, count + 1))
+    rng.shuffle(ranks)
+    return list(accumulate(1.0 / rank ** skew for rank in ranks))
+
+
+def _sentence(rng, words):
+    return ' '.join(rng.sample(WORDS, words))
+
+
+def _insert(table, rows):
+    if rows:
+        db.session.execute(table.insert(), rows)
+        rows.clear()
+
+
+def _insert_tuples(table, columns, rows):
+    """Bulk insert tuples straight through the driver's executemany.
+
+    Skips SQLAlchemy's per-row parameter processing, which is most of the
+    cost at tens of millions of rows. Values must already be driver-ready.
+    """
+    if not rows:
+        return
+    connection = db.session.connection()
+    compiled = table.insert().compile(dialect=connection.dialect, column_keys=list(columns))
+    if compiled.positional:
+        order = [columns.index(name) for name in compiled.positiontup]
+        params = rows if order == list(range(len(columns))) else [tuple(row[i] for i in order) for row in rows]
+    else:
+        params = [dict(zip(columns, row)) for row in rows]
+    connection.exec_driver_sql(str(compiled), params)
+    rows.clear()
+
+
+def seed_database(teachers, students, quizzes, attempts, questions=10, days=365, until=None,
+                  seed=0, batch_size=BATCH_SIZE, log=print):
+    """Fill an empty database with synthetic users, quizzes, attempts and answers.
+
+    The data is skewed the way real usage is: a few categories, teachers and
+    quizzes account for most of the activity, 20% of questions are
+    descriptive, a third of quizzes are short exam windows, and students
+    differ in ability. Rows are written with bulk inserts, bypassing the ORM.
+    The same arguments give the same rows, whatever day they are run.
+    """
+    if db.session.query(User.id).first() is not None:
+        raise ValueError('The database already has users; seed an empty database.')
+
+    rng = random.Random(seed)
+    until = until or DEFAULT_UNTIL
+    since = until - timedelta(days=days)
+    span = (until - since).total_seconds()
+    password_hash = generate_password_hash(SEED_PASSWORD)  # hashing once keeps 50k users fast
+
+    def moment(start=since, end=until):
+        return start + timedelta(seconds=rng.random() * max((end - start).total_seconds(), 0))
+
+    # Users: teachers first, then students
+    user_rows = []
+    for index in range(teachers):
+        user_rows.append({'id': index + 1, 'username': f'teacher{index + 1:04d}',
+                          'email': f'teacher{index + 1:04d}@example.com', 'password_hash': password_hash,
+                          'role': 'teacher', 'is_teacher': True, 'created_at': since - timedelta(days=30)})
+    student_ids = list(range(teachers + 1, teachers + students + 1))
+    student_joined = {}
+    for number, student_id in enumerate(student_ids, 1):
+        student_joined[student_id] = since + timedelta(seconds=rng.random() * span * 0.5)
+        user_rows.append({'id': student_id, 'username': f'student{number:06d}',
+                          'email': f'student{number:06d}@example.com', 'password_hash': password_hash,
+                          'role': 'student', 'is_teacher': False, 'created_at': student_joined[student_id]})
+        if len(user_rows) >= batch_size:
+            _insert(User.__table__, user_rows)
+    _insert(User.__table__, user_rows)
+    ability = {student_id: rng.betavariate(5, 3) for student_id in student_ids}
+    log(f'Users: {teachers} teachers, {students} students')
+
+    # Quizzes, questions and options. Kept in memory as the answer key for the attempts:
+    # quiz_id -> [(question_id, question_type, points, difficulty, option_ids, correct option or key text)]
+    category_weights = _zipf_cum_weights(len(QUIZ_CATEGORIES), 1.1, rng)
+    author_weights = _zipf_cum_weights(teachers, 0.9, rng)
+    quiz_info, quiz_keys, private_audience = {}, {}, {}
+    quiz_rows, question_rows, option_rows, share_rows = [], [], [], []
+    question_id = option_id = 0
+    for quiz_id in range(1, quizzes + 1):
+        created = moment(since, until - timedelta(days=1))
+        if rng.random() < 1 / 3:
+            # Exam: a window of one to three hours within two weeks of creation
+            start = created + timedelta(days=rng.randint(1, 14), hours=rng.randint(8, 16))
+            end = start + timedelta(hours=rng.randint(1, 3))
+            time_limit = rng.choice((30, 45, 60, 90))
+        else:
+            start, end = created, created + timedelta(days=rng.randint(7, 180))
+            time_limit = rng.choice((None, None, 20, 30))
+        is_public = rng.random() < 0.85
+        quiz_info[quiz_id] = (start, min(end, until), time_limit)
+        quiz_rows.append({
+            'id': quiz_id, 'title': _sentence(rng, 3).title(), 'description': _sentence(rng, 12),
+            'author_id': rng.choices(range(1, teachers + 1), cum_weights=author_weights)[0],
+            'created_at': created, 'updated_at': created, 'is_public': is_public,
+            'time_limit': time_limit, 'max_attempts': rng.choice((1, 1, 1, 2, 3)),
+            'start_time': start, 'end_time': end,
+            'category': rng.choices(QUIZ_CATEGORIES, cum_weights=category_weights)[0][0],
+            'grades_released': end < until and rng.random() < 0.8,
+        })
+        if not is_public:
+            private_audience[quiz_id] = rng.sample(student_ids, min(len(student_ids), rng.randint(5, 40)))
+            share_rows.extend({'user_id': student_id, 'quiz_id': quiz_id, 'shared_at': created}
+                              for student_id in private_audience[quiz_id])
+
+        key = quiz_keys[quiz_id] = []
+        for order in range(1, max(1, round(rng.gauss(questions, questions / 4))) + 1):
+            question_id += 1
+            descriptive = rng.random() < 0.2
+            points = rng.randint(2, 5) if descriptive else rng.choice((1, 1, 1, 2, 3))
+            question_rows.append({'id': question_id, 'quiz_id': quiz_id, 'text': _sentence(rng, 8) + '?',
+                                  'question_type': 'descriptive' if descriptive else 'mcq',
+                                  'points': points, 'order': order})
+            if descriptive:
+                # The first option of a descriptive question holds its correct answer
+                option_id += 1
+                answer_text = _sentence(rng, 2)
+                option_rows.append({'id': option_id, 'question_id': question_id, 'text': answer_text,
+                                    'is_correct': True, 'order': 1})
+                key.append((question_id, 'descriptive', points, rng.uniform(0.4, 1.0), None, answer_text))
+            else:
+                correct_index = rng.randrange(4)
+                option_ids = list(range(option_id + 1, option_id + 5))
+                for index, current_id in enumerate(option_ids):
+                    option_rows.append({'id': current_id, 'question_id': question_id,
+                                        'text': _sentence(rng, 3), 'is_correct': index == correct_index,
+                                        'order': index + 1})
+                option_id += 4
+                key.append((question_id, 'mcq', points, rng.uniform(0.6, 1.2), option_ids,
+                            option_ids[correct_index]))
+        if len(option_rows) >= batch_size:
+            _insert(Quiz.__table__, quiz_rows)
+            _insert(Question.__table__, question_rows)
+            _insert(QuestionOption.__table__, option_rows)
+    _insert(Quiz.__table__, quiz_rows)
+    _insert(Question.__table__, question_rows)
+    _insert(QuestionOption.__table__, option_rows)
+    for start in range(0, len(share_rows), batch_size):
+        db.session.execute(shared_quizzes.insert(), share_rows[start:start + batch_size])
+    db.session.commit()
+    log(f'Quizzes: {quizzes} with {question_id} questions and {option_id} options')
+
+    # Attempts and answers, drawn from skewed quiz popularity and student activity
+    quiz_weights = _zipf_cum_weights(quizzes, 0.8, rng)
+    student_weights = _zipf_cum_weights(students, 0.5, rng)
+    quiz_ids = range(1, quizzes + 1)
+    stats = {quiz_id: [0, 0, 0, 0.0, 0.0, None, None] for quiz_id in quiz_ids}
+    attempt_rows, answer_rows = [], []
+    answer_count = batches = 0
+    for attempt_id in range(1, attempts + 1):
+        quiz_id = rng.choices(quiz_ids, cum_weights=quiz_weights)[0]
+        if quiz_id in private_audience:
+            student_id = rng.choice(private_audience[quiz_id])
+        else:
+            student_id = student_ids[rng.choices(range(students), cum_weights=student_weights)[0]]
+        start, end, time_limit = quiz_info[quiz_id]
+        started = moment(max(start, student_joined[student_id]), end)
+        quiz_stats = stats[quiz_id]
+        quiz_stats[0] += 1
+
+        if rng.random() < 0.07:
+            # Abandoned: never submitted, no answers
+            attempt_rows.append({'id': attempt_id, 'quiz_id': quiz_id, 'student_id': student_id,
+                                 'started_at': started, 'completed_at': None, 'completed': False,
+                                 'score': None, 'max_score': None})
+        else:
+            score = max_score = 0
+            skill = ability[student_id]
+            for question_id, question_type, points, difficulty, option_ids, correct in quiz_keys[quiz_id]:
+                max_score += points
+                is_correct = rng.random() < min(skill * difficulty, 0.98)
+                selected_option_id = text_answer = None
+                if question_type == 'mcq':
+                    if is_correct:
+                        selected_option_id = correct
+                    elif rng.random() < 0.9:  # the rest are left blank
+                        selected_option_id = rng.choice([o for o in option_ids if o != correct])
+                else:
+                    text_answer = correct if is_correct else rng.choice(WRONG_ANSWERS)
+                if is_correct:
+                    score += points
+                answer_rows.append((attempt_id, question_id, selected_option_id, text_answer,
+                                    is_correct, points if is_correct else 0))
+            answer_count += len(quiz_keys[quiz_id])
+            minutes = time_limit or 45
+            attempt_rows.append({'id': attempt_id, 'quiz_id': quiz_id, 'student_id': student_id,
+                                 'started_at': started,
+                                 'completed_at': started + timedelta(minutes=rng.uniform(1, minutes)),
+                                 'completed': True, 'score': score, 'max_score': max_score})
+            quiz_stats[1] += 1
+            quiz_stats[2] += 1
+            quiz_stats[3] += score
+            quiz_stats[4] += score * score
+            quiz_stats[5] = score if quiz_stats[5] is None else min(quiz_stats[5], score)
+            quiz_stats[6] = score if quiz_stats[6] is None else max(quiz_stats[6], score)
+
+        if len(answer_rows) >= batch_size or len(attempt_rows) >= batch_size:
+            _insert(QuizAttempt.__table__, attempt_rows)
+            _insert_tuples(Answer.__table__, ANSWER_COLUMNS, answer_rows)
+            db.session.commit()
+            batches += 1
+            if batches % 10 == 0:
+                log(f'  {attempt_id} attempts, {answer_count} answers')
+    _insert(QuizAttempt.__table__, attempt_rows)
+    _insert_tuples(Answer.__table__, ANSWER_COLUMNS, answer_rows)
+    db.session.commit()
+    log(f'Attempts: {attempts} with {answer_count} answers')
+
+    # Precomputed statistics, so dashboards do not rebuild them on first view
+    total_points = {quiz_id: sum(entry[2] for entry in key) for quiz_id, key in quiz_keys.items()}
+    stats_rows = [{'quiz_id': quiz_id, 'attempt_count': s[0], 'completed_count': s[1], 'graded_count': s[2],
+                   'score_sum': s[3], 'score_sq_sum': s[4], 'lowest_score': s[5], 'highest_score': s[6],
+                   'total_points': total_points[quiz_id], 'updated_at': until}
+                  for quiz_id, s in stats.items()]
+    for start in range(0, len(stats_rows), batch_size):
+        db.session.execute(QuizStats.__table__.insert(), stats_rows[start:start + batch_size])
+    db.session.commit()
+
+    from app.utils.search import rebuild_search_index
+    rebuild_search_index()
+    log('Rebuilt quiz statistics and the search index')
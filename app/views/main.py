@@ -3,8 +3,11 @@ from flask_login import current_user, login_required
 from app import db
 from app.models.user import User
 from app.models.quiz import Quiz, QuizAttempt
+from app.models.quiz_stats import QuizStats
 from app.models.bookmark import Bookmark
 from app.forms.auth import UpdateProfileForm
+from app.utils.access import access_cache
+from app.utils.pagination import page_from_request
 
 main_bp = Blueprint('main', __name__)
 
@@ -22,11 +25,12 @@ def index():
 @login_required
 def profile(username):
     user = User.query.filter_by(username=username).first_or_404()
+    # The profile only shows how many quizzes there are, so count them in the database
     if current_user.is_teacher:
-        quizzes = Quiz.query.filter_by(author_id=user.id).order_by(Quiz.created_at.desc()).all()
+        quiz_count = Quiz.query.filter_by(author_id=user.id).count()
     else:
-        quizzes = Quiz.query.filter_by(is_public=True).order_by(Quiz.created_at.desc()).all()
-    return render_template('main/profile.html', user=user, quizzes=quizzes)
+        quiz_count = Quiz.query.filter_by(is_public=True).count()
+    return render_template('main/profile.html', user=user, quiz_count=quiz_count)
 
 @main_bp.route('/profile/<username>/edit', methods=['GET', 'POST'])
 @login_required
@@ -40,6 +44,7 @@ def edit_profile(username):
         current_user.username = form.username.data
         current_user.bio = form.bio.data
         db.session.commit()
+        access_cache.forget_user(current_user.id)
         flash('Your profile has been updated.', 'success')
         return redirect(url_for('main.profile', username=current_user.username))
     elif request.method == 'GET':
@@ -57,7 +62,7 @@ def history():
         category = request.args.get('category')
         if category:
             quizzes = quizzes.filter_by(category=category)
-        quizzes = quizzes.order_by(Quiz.created_at.desc()).all()
+        quizzes = page_from_request(quizzes, (Quiz.created_at, Quiz.id))
         
         # Get unique categories for the filter dropdown
         categories = db.session.query(Quiz.category).distinct().all()
@@ -68,9 +73,9 @@ def history():
                              categories=categories,
                              selected_category=category)
     else:
-        # Get all attempts by the student
-        attempts = QuizAttempt.query.filter_by(student_id=current_user.id)\
-            .order_by(QuizAttempt.started_at.desc()).all()
+        # Get the student's attempts, one page at a time
+        attempts = page_from_request(QuizAttempt.query.filter_by(student_id=current_user.id),
+                                     (QuizAttempt.started_at, QuizAttempt.id))
         return render_template('student/history.html', attempts=attempts)
 
 @main_bp.route('/student')
@@ -158,8 +163,8 @@ def student_history():
     if category:
         attempts_query = attempts_query.join(Quiz).filter(Quiz.category == category)
     
-    # Get all attempts ordered by start date
-    attempts = attempts_query.order_by(QuizAttempt.started_at.desc()).all()
+    # Get one page of attempts ordered by start date
+    attempts = page_from_request(attempts_query, (QuizAttempt.started_at, QuizAttempt.id))
     
     # Get unique categories for the filter dropdown
     categories = db.session.query(Quiz.category).distinct().all()
@@ -203,40 +208,19 @@ def teacher_home():
     # Get all quizzes created by the teacher
     quizzes = Quiz.query.filter_by(author_id=current_user.id).all()
     
-    # Calculate statistics for each quiz
+    # Read the precomputed statistics for all quizzes in one query
+    stats_by_quiz = QuizStats.for_quizzes(quiz.id for quiz in quizzes)
     quiz_stats = []
     for quiz in quizzes:
-        attempts = QuizAttempt.query.filter_by(quiz_id=quiz.id).all()
-        total_attempts = len(attempts)
-        if total_attempts > 0:
-            scores = [attempt.score for attempt in attempts if attempt.score is not None]
-            if scores:  # Only calculate if we have valid scores
-                avg_score = sum(scores) / len(scores)
-                max_score = sum(question.points for question in quiz.questions)
-                highest_score = max(scores)
-                lowest_score = min(scores)
-                avg_percentage = (avg_score / max_score) * 100
-            else:
-                avg_score = 0
-                max_score = sum(question.points for question in quiz.questions)
-                highest_score = 0
-                lowest_score = 0
-                avg_percentage = 0
-        else:
-            avg_score = 0
-            max_score = sum(question.points for question in quiz.questions)
-            highest_score = 0
-            lowest_score = 0
-            avg_percentage = 0
-        
+        stats = stats_by_quiz[quiz.id]
         quiz_stats.append({
             'quiz': quiz,
-            'total_attempts': total_attempts,
-            'avg_score': avg_score,
-            'max_score': max_score,
-            'highest_score': highest_score,
-            'lowest_score': lowest_score,
-            'avg_percentage': avg_percentage
+            'total_attempts': stats.attempt_count,
+            'avg_score': stats.avg_score,
+            'max_score': stats.total_points,
+            'highest_score': stats.highest_score or 0,
+            'lowest_score': stats.lowest_score or 0,
+            'avg_percentage': stats.avg_percentage
         })
     
     # Get recent attempts across all quizzes
@@ -249,20 +233,12 @@ def teacher_home():
     
     # Get popular quizzes (most attempts) with their average scores
     popular_quizzes = []
-    for quiz in sorted(quizzes, key=lambda x: len(x.attempts), reverse=True)[:5]:
-        attempts = QuizAttempt.query.filter_by(quiz_id=quiz.id).all()
-        if attempts:
-            scores = [a.score for a in attempts if a.score is not None]
-            if scores:
-                max_score = sum(q.points for q in quiz.questions)
-                avg_score = (sum(scores) / len(scores) / max_score) * 100 if max_score > 0 else 0
-            else:
-                avg_score = 0
-        else:
-            avg_score = 0
+    for quiz in sorted(quizzes, key=lambda x: stats_by_quiz[x.id].attempt_count, reverse=True)[:5]:
+        stats = stats_by_quiz[quiz.id]
         popular_quizzes.append({
             'quiz': quiz,
-            'avg_score': avg_score
+            'total_attempts': stats.attempt_count,
+            'avg_score': stats.avg_percentage
         })
     
     from datetime import datetime
@@ -1,14 +1,26 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, Response
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify, current_app
 from flask_login import current_user, login_required
 from app import db
 from app.models.quiz import Quiz, QuizAttempt, Question, QuestionOption, Answer, QuizFeedback
-from app.models.user import User
+from app.models.user import User, shared_quizzes
 from app.forms.quiz import QuizForm, QuizSearchForm, QuizPasswordForm, AnswerForm, FeedbackForm
 from app.utils.email import send_quiz_result_email, send_quiz_invitation_email, send_quiz_grades_email
+from app.utils.grading import submit_attempt, queue_attempt, invalidate_answer_key
+from app.utils.grading_queue import grading_queue, grading_status, has_unfinished_jobs
+from app.utils import analytics
+from app.utils.search import search_query, public_quizzes, SEARCH_PAGE_SIZE
+from app.utils.pagination import page_from_request
+from app.utils.loaders import with_profile
+from app.utils.render_cache import fragment_cache
+from app.utils.access import access_cache
+from app.utils.conditional import ConditionalPage
+from app.utils.export import keyset_batches, csv_chunks, streaming_download, wants_gzip, answer_export_statement, answer_export_chunks
+from app.models.grading_job import GradingJob
+from app.models.quiz_stats import QuizStats
 from datetime import datetime
+from markupsafe import Markup
+from sqlalchemy import select
 from urllib.parse import urlparse
-from io import StringIO
-import csv
 
 quiz_bp = Blueprint('quiz', __name__, url_prefix='/quiz')
 
@@ -60,6 +72,8 @@ def create_quiz():
                     )
                     db.session.add(option)
             
+            db.session.flush()
+            QuizStats.rebuild(quiz.id)
             db.session.commit()
             flash('Quiz created successfully!', 'success')
             return redirect(url_for('quiz.view_quiz', quiz_id=quiz.id))
@@ -78,23 +92,26 @@ def view_quiz(quiz_id):
         if not quiz.password:
             flash('This quiz is private.', 'danger')
             return redirect(url_for('main.index'))
-        if quiz not in current_user.shared_quizzes:
+        if not access_cache.is_shared_with(current_user.id, quiz.id):
             return redirect(url_for('quiz.enter_password', quiz_id=quiz_id))
     
-    # Calculate statistics
-    attempts = quiz.attempts  # This is already a list
-    total_attempts = len(attempts)  # Use len() instead of count()
-    if total_attempts > 0:
-        scores = [attempt.score for attempt in attempts if attempt.score is not None]
-        avg_score = sum(scores) / len(scores) if scores else 0
-        max_score = sum(question.points for question in quiz.questions)
-        highest_score = max(scores) if scores else 0
-        lowest_score = min(scores) if scores else 0
-    else:
-        avg_score = 0
-        max_score = sum(question.points for question in quiz.questions)
-        highest_score = 0
-        lowest_score = 0
+    # Read the precomputed statistics instead of scanning every attempt
+    stats = QuizStats.for_quiz(quiz.id)
+    
+    # Every attempt started or graded bumps the statistics, so they version the
+    # attempt list too; only the author sees feedback
+    feedback_version = _feedback_state(quiz.id) if current_user.id == quiz.author_id else None
+    page = ConditionalPage('view_quiz', quiz.id, quiz.updated_at, quiz.grades_released, stats.updated_at,
+                           feedback_version)
+    not_modified = page.not_modified()
+    if not_modified:
+        return not_modified
+    
+    total_attempts = stats.attempt_count
+    avg_score = stats.avg_score
+    max_score = stats.total_points
+    highest_score = stats.highest_score or 0
+    lowest_score = stats.lowest_score or 0
     
     # Get student attempts if user is a student
     student_attempts = None
@@ -112,7 +129,7 @@ def view_quiz(quiz_id):
     # Calculate total questions
     total_questions = len(quiz.questions)
     
-    return render_template('quiz/view.html', 
+    return page.response(render_template('quiz/view.html', 
                          quiz=quiz,
                          attempts=student_attempts,
                          total_attempts=total_attempts,
@@ -121,7 +138,7 @@ def view_quiz(quiz_id):
                          max_score=max_score,
                          highest_score=highest_score,
                          lowest_score=lowest_score,
-                         feedback=feedback)
+                         feedback=feedback))
 
 @quiz_bp.route('/quiz/<int:quiz_id>/password', methods=['GET', 'POST'])
 @login_required
@@ -134,8 +151,7 @@ def enter_password(quiz_id):
     if form.validate_on_submit():
         if form.password.data == quiz.password:
             # Share quiz with user
-            if quiz not in current_user.shared_quizzes:
-                current_user.shared_quizzes.append(quiz)
+            if access_cache.share_quiz(current_user.id, quiz.id):
                 db.session.commit()
                 flash('Quiz accessed successfully!', 'success')
             else:
@@ -148,6 +164,8 @@ def enter_password(quiz_id):
 @quiz_bp.route('/quiz/<int:quiz_id>/take', methods=['GET', 'POST'])
 @login_required
 def take_quiz(quiz_id):
+    # Submissions are graded from the cached answer key and the question list is
+    # rendered from the fragment cache, so questions are only loaded on a cache miss
     quiz = Quiz.query.get_or_404(quiz_id)
     
     # Check if user can take the quiz
@@ -155,7 +173,7 @@ def take_quiz(quiz_id):
         if not quiz.password:
             flash('This quiz is private.', 'danger')
             return redirect(url_for('main.index'))
-        if quiz not in current_user.shared_quizzes:
+        if not access_cache.is_shared_with(current_user.id, quiz.id):
             return redirect(url_for('quiz.enter_password', quiz_id=quiz_id))
     
     # Check if grades have been released and user is a student
@@ -187,58 +205,36 @@ def take_quiz(quiz_id):
         # Start new attempt
         attempt = QuizAttempt(quiz_id=quiz_id, student_id=current_user.id)
         db.session.add(attempt)
+        QuizStats.record_attempt_started(quiz_id)
         db.session.commit()
     
     if request.method == 'POST':
-        # Process answers
-        for question in quiz.questions:
-            if question.question_type == 'mcq':
-                option_id = request.form.get(f'question_{question.id}')
-                option = QuestionOption.query.get(option_id)
-                answer = Answer(
-                    attempt_id=attempt.id,
-                    question_id=question.id,
-                    selected_option_id=option_id,
-                    is_correct=option.is_correct if option else False,
-                    points_earned=question.points if option and option.is_correct else 0
-                )
-            else:  # Descriptive question
-                text_answer = request.form.get(f'question_{question.id}')
-                # Get the correct answer from the question's options (first option is the correct answer)
-                correct_option = QuestionOption.query.filter_by(question_id=question.id).order_by(QuestionOption.order).first()
-                correct_answer = correct_option.text if correct_option else ""
-                
-                # Remove whitespace and convert to lowercase for comparison
-                student_answer = ''.join(text_answer.split()).lower() if text_answer else ""
-                correct_answer = ''.join(correct_answer.split()).lower() if correct_answer else ""
-                
-                is_correct = student_answer == correct_answer
-                answer = Answer(
-                    attempt_id=attempt.id,
-                    question_id=question.id,
-                    text_answer=text_answer,
-                    is_correct=is_correct,
-                    points_earned=question.points if is_correct else 0
-                )
-            db.session.add(answer)
-        
-        attempt.completed_at = datetime.utcnow()
-        attempt.score = sum(a.points_earned for a in attempt.answers if a.points_earned)
-        attempt.max_score = sum(q.points for q in quiz.questions)
-        db.session.commit()
-        
-        # Send email with results
-        send_quiz_result_email(current_user, quiz, attempt.score, attempt.max_score, attempt)
+        if current_app.config['GRADING_MODE'] == 'async':
+            # Store the raw responses only; a grading worker scores them and sends the email
+            queue_attempt(attempt, quiz, request.form)
+            grading_queue.notify()
+        else:
+            # Grade in memory and write all answers in one bulk insert
+            submit_attempt(attempt, quiz, request.form)
+            
+            # Send email with results
+            send_quiz_result_email(current_user, quiz, attempt.score, attempt.max_score, attempt)
         
         flash('Quiz submitted successfully! You will be able to view your results once the teacher releases the grades.', 'success')
         return redirect(url_for('main.index'))
     
-    return render_template('quiz/take.html', quiz=quiz)
+    # The question list is the same for every student taking this version of the quiz
+    questions_html = fragment_cache.get_or_render(
+        ('take', quiz.id, quiz.updated_at),
+        lambda: render_template('quiz/_take_questions.html',
+                                quiz=with_profile(Quiz.query, 'take').filter_by(id=quiz.id).one()))
+    return render_template('quiz/take.html', quiz=quiz, questions_html=Markup(questions_html))
 
 @quiz_bp.route('/quiz/results/<int:attempt_id>')
 @login_required
 def view_results(attempt_id):
-    attempt = QuizAttempt.query.get_or_404(attempt_id)
+    # Answers and questions are only loaded once the browser's copy turns out to be stale
+    attempt = with_profile(QuizAttempt.query, 'attempt').get_or_404(attempt_id)
     if attempt.student_id != current_user.id and attempt.quiz.author_id != current_user.id:
         flash('You do not have permission to view these results.', 'danger')
         return redirect(url_for('main.index'))
@@ -248,14 +244,37 @@ def view_results(attempt_id):
         flash('Grades for this quiz have not been released yet.', 'warning')
         return redirect(url_for('main.index'))
     
-    return render_template('quiz/detailed_results.html', 
+    quiz = attempt.quiz
+    page = ConditionalPage('view_results', attempt.id, attempt.completed_at, attempt.score, attempt.max_score,
+                           quiz.updated_at, quiz.grades_released)
+    not_modified = page.not_modified()
+    if not_modified:
+        return not_modified
+    
+    attempt = with_profile(QuizAttempt.query, 'review').filter_by(id=attempt.id).one()
+    return page.response(render_template('quiz/detailed_results.html', 
                          attempt=attempt,
-                         quiz=attempt.quiz)
+                         quiz=quiz))
+
+@quiz_bp.route('/quiz/attempt/<int:attempt_id>/status')
+@login_required
+def attempt_status(attempt_id):
+    """Report whether an attempt has been graded yet (polled by the results page)."""
+    attempt = QuizAttempt.query.get_or_404(attempt_id)
+    if attempt.student_id != current_user.id and attempt.quiz.author_id != current_user.id:
+        return jsonify({'error': 'Access denied'}), 403
+    
+    status = grading_status(attempt)
+    data = {'status': status}
+    if status == 'graded' and (attempt.quiz.grades_released or attempt.quiz.author_id == current_user.id):
+        data['score'] = attempt.score
+        data['max_score'] = attempt.max_score
+    return jsonify(data)
 
 @quiz_bp.route('/quiz/<int:quiz_id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit_quiz(quiz_id):
-    quiz = Quiz.query.get_or_404(quiz_id)
+    quiz = with_profile(Quiz.query, 'edit').get_or_404(quiz_id)
     if quiz.author_id != current_user.id:
         flash('You can only edit your own quizzes.', 'danger')
         return redirect(url_for('main.index'))
@@ -282,9 +301,7 @@ def edit_quiz(quiz_id):
         # Delete questions that are not in the form
         for question in quiz.questions:
             if question.id not in form_question_ids:
-                # Delete associated options first
-                QuestionOption.query.filter_by(question_id=question.id).delete()
-                # Then delete the question
+                # Deleting the question cascades to its (already loaded) options
                 db.session.delete(question)
         
         # Update or create questions and options
@@ -343,7 +360,20 @@ def edit_quiz(quiz_id):
                     )
                     db.session.add(option)
         
+        # Bump the version even if only questions changed, so cached answer keys are rebuilt
+        quiz.updated_at = datetime.utcnow()
+        QuizStats.refresh_total_points(quiz.id)
+        # Queued attempts are graded with the quiz's current answer key, so the questions
+        # must not change under them. Checked after the flush, which holds the write lock,
+        # so no attempt can be queued between the check and the commit.
+        db.session.flush()
+        if has_unfinished_jobs(quiz.id):
+            db.session.rollback()
+            flash('Some attempts at this quiz are still being graded. Please try again in a moment.', 'warning')
+            return redirect(url_for('quiz.edit_quiz', quiz_id=quiz.id))
         db.session.commit()
+        invalidate_answer_key(quiz.id)
+        fragment_cache.invalidate('take', quiz.id)
         flash('Quiz updated successfully!', 'success')
         return redirect(url_for('quiz.view_quiz', quiz_id=quiz.id))
     
@@ -359,9 +389,14 @@ def delete_quiz(quiz_id):
     
     try:
         # First, remove all shared quiz associations
-        quiz.shared_with = []
+        access_cache.unshare_quiz(quiz_id)
         db.session.commit()
         
+        # Delete queued grading jobs for the quiz's attempts
+        GradingJob.query.filter(GradingJob.attempt_id.in_(
+            db.session.query(QuizAttempt.id).filter_by(quiz_id=quiz_id)
+        )).delete(synchronize_session=False)
+        
         # Delete all related quiz attempts
         QuizAttempt.query.filter_by(quiz_id=quiz_id).delete()
         
@@ -371,16 +406,22 @@ def delete_quiz(quiz_id):
         )).delete(synchronize_session=False)
         
         # Delete all related questions and options
-        for question in quiz.questions:
-            QuestionOption.query.filter_by(question_id=question.id).delete()
-        Question.query.filter_by(quiz_id=quiz_id).delete()
+        QuestionOption.query.filter(QuestionOption.question_id.in_(
+            db.session.query(Question.id).filter_by(quiz_id=quiz_id)
+        )).delete(synchronize_session=False)
+        Question.query.filter_by(quiz_id=quiz_id).delete(synchronize_session=False)
         
         # Delete all related feedback
         QuizFeedback.query.filter_by(quiz_id=quiz_id).delete()
         
+        # Delete the precomputed statistics
+        QuizStats.query.filter_by(quiz_id=quiz_id).delete()
+        
         # Finally delete the quiz
         db.session.delete(quiz)
         db.session.commit()
+        invalidate_answer_key(quiz_id)
+        fragment_cache.invalidate('take', quiz_id)
         flash('Quiz deleted successfully.', 'success')
     except Exception as e:
         db.session.rollback()
@@ -391,21 +432,29 @@ def delete_quiz(quiz_id):
     else:
         return redirect(url_for('student.dashboard'))
 
-@quiz_bp.route('/quiz/search', methods=['GET', 'POST'])
+@quiz_bp.route('/quiz/search')
 @login_required
 def search_quizzes():
-    form = QuizSearchForm()
-    if form.validate_on_submit():
-        query = Quiz.query.filter_by(is_public=True)
-        if form.search.data:
-            query = query.filter(Quiz.title.ilike(f'%{form.search.data}%'))
-        if form.category.data:
-            query = query.filter_by(category=form.category.data)
-        quizzes = query.order_by(Quiz.created_at.desc()).all()
+    # Searches are plain GET requests so that result pages can be linked and paged
+    form = QuizSearchForm(request.args, meta={'csrf': False})
+    search, category = '', ''
+    if form.validate():
+        search, category = form.search.data or '', form.category.data or ''
+    
+    pagination = page = None
+    if search.strip():
+        # Ranked results are paged by number
+        pagination = search_query(search, category).paginate(
+            page=request.args.get('page', 1, type=int), per_page=SEARCH_PAGE_SIZE, error_out=False)
+        quizzes = pagination.items
     else:
-        quizzes = Quiz.query.filter_by(is_public=True).order_by(Quiz.created_at.desc()).all()
+        # Browsing lists the newest quizzes, paged with a cursor
+        page = page_from_request(public_quizzes(category), (Quiz.created_at, Quiz.id), SEARCH_PAGE_SIZE)
+        quizzes = page.items
     
-    return render_template('quiz/search.html', title='Search Quizzes', form=form, quizzes=quizzes)
+    return render_template('quiz/search.html', title='Search Quizzes', form=form,
+                           quizzes=quizzes, pagination=pagination, page=page,
+                           search=search, category=category)
 
 @quiz_bp.route('/quiz/<int:quiz_id>/bookmark', methods=['POST'])
 @login_required
@@ -453,12 +502,11 @@ def enter_quiz_link():
             if not quiz.password:
                 flash('This quiz is private.', 'danger')
                 return redirect(url_for('main.index'))
-            if quiz not in current_user.shared_quizzes:
+            if not access_cache.is_shared_with(current_user.id, quiz.id):
                 return redirect(url_for('quiz.enter_password', quiz_id=quiz_id))
         
         # If we get here, either the quiz is public or the user has access
-        if quiz not in current_user.shared_quizzes:
-            current_user.shared_quizzes.append(quiz)
+        if access_cache.share_quiz(current_user.id, quiz.id):
             db.session.commit()
             flash('Quiz has been added to your dashboard!', 'success')
         else:
@@ -483,12 +531,11 @@ def take_shared_quiz(quiz_id):
         if not quiz.password:
             flash('This quiz is private.', 'danger')
             return redirect(url_for('main.index'))
-        if quiz not in current_user.shared_quizzes:
+        if not access_cache.is_shared_with(current_user.id, quiz.id):
             return redirect(url_for('quiz.enter_password', quiz_id=quiz_id))
     
     # If we get here, either the quiz is public or the user has access
-    if quiz not in current_user.shared_quizzes:
-        current_user.shared_quizzes.append(quiz)
+    if access_cache.share_quiz(current_user.id, quiz.id):
         db.session.commit()
         flash('Quiz has been added to your dashboard!', 'success')
     
@@ -502,63 +549,35 @@ def quiz_results(quiz_id):
         flash('You do not have permission to view these results.', 'danger')
         return redirect(url_for('main.index'))
     
-    # Get all attempts for this quiz
-    attempts = QuizAttempt.query.filter_by(quiz_id=quiz_id).all()
-    
-    # Calculate statistics
-    total_attempts = len(attempts)
-    if total_attempts > 0:
-        scores = [attempt.score for attempt in attempts if attempt.score is not None]
-        if scores:  # Only calculate if we have valid scores
-            avg_score = sum(scores) / len(scores)
-            max_score = sum(question.points for question in quiz.questions)
-            highest_score = max(scores)
-            lowest_score = min(scores)
-            avg_percentage = (avg_score / max_score) * 100
-        else:
-            avg_score = 0
-            max_score = sum(question.points for question in quiz.questions)
-            highest_score = 0
-            lowest_score = 0
-            avg_percentage = 0
-    else:
-        avg_score = 0
-        max_score = sum(question.points for question in quiz.questions)
-        highest_score = 0
-        lowest_score = 0
-        avg_percentage = 0
-    
-    # Calculate question-wise statistics
-    question_stats = []
-    for question in quiz.questions:
-        correct_answers = 0
-        total_answers = 0
-        
-        for attempt in attempts:
-            if attempt.completed_at:  # Only count completed attempts
-                answer = Answer.query.filter_by(
-                    attempt_id=attempt.id,
-                    question_id=question.id
-                ).first()
-                
-                if answer:
-                    total_answers += 1
-                    if answer.is_correct:
-                        correct_answers += 1
-        
-        success_rate = (correct_answers / total_answers * 100) if total_answers > 0 else 0
-        
-        question_stats.append({
-            'question': question,
-            'correct_count': correct_answers,
-            'total_attempts': total_answers,
-            'success_rate': round(success_rate, 2)
-        })
+    # Attempts and grading bump the statistics; check them before running the item analysis
+    stats = QuizStats.for_quiz(quiz.id)
+    page = ConditionalPage('quiz_results', quiz.id, quiz.updated_at, quiz.grades_released, stats.updated_at,
+                           _feedback_state(quiz.id))
+    not_modified = page.not_modified()
+    if not_modified:
+        return not_modified
+    
+    # Get one page of attempts for this quiz, newest first
+    attempts = page_from_request(QuizAttempt.query.filter_by(quiz_id=quiz_id),
+                                 (QuizAttempt.started_at, QuizAttempt.id))
+    
+    # Read the precomputed statistics
+    total_attempts = stats.attempt_count
+    avg_score = stats.avg_score
+    max_score = stats.total_points
+    highest_score = stats.highest_score or 0
+    lowest_score = stats.lowest_score or 0
+    avg_percentage = stats.avg_percentage
+    
+    # Calculate question-wise statistics and item analysis
+    item_analysis = analytics.ItemAnalysis.for_quiz(quiz)
+    question_stats = analytics.question_stats(quiz, item_analysis)
+    distractors = analytics.distractor_report(quiz)
     
     # Get all feedback for this quiz
     feedback = QuizFeedback.query.filter_by(quiz_id=quiz_id).all()
     
-    return render_template('quiz/results.html', 
+    return page.response(render_template('quiz/results.html', 
                          quiz=quiz, 
                          attempts=attempts,
                          avg_score=avg_score,
@@ -568,7 +587,9 @@ def quiz_results(quiz_id):
                          lowest_score=lowest_score,
                          total_attempts=total_attempts,
                          question_stats=question_stats,
-                         feedback=feedback)
+                         reliability=item_analysis.alpha,
+                         distractors=distractors,
+                         feedback=feedback))
 
 @quiz_bp.route('/quiz/<int:quiz_id>/release-grades', methods=['POST'])
 @login_required
@@ -606,36 +627,73 @@ def export_results(quiz_id):
         flash('You do not have permission to export these results.', 'danger')
         return redirect(url_for('main.index'))
     
-    attempts = QuizAttempt.query.filter_by(quiz_id=quiz_id).all()
+    # Joined attempt + student rows, read in keyset batches while the response streams
+    statement = select(
+        QuizAttempt.id, QuizAttempt.score, QuizAttempt.max_score,
+        QuizAttempt.started_at, QuizAttempt.completed_at, User.username
+    ).join(User, User.id == QuizAttempt.student_id)\
+        .where(QuizAttempt.quiz_id == quiz_id)
+    
+    def rows():
+        for batch in keyset_batches(statement, QuizAttempt.id):
+            yield [[
+                attempt.username,
+                attempt.score,
+                attempt.max_score,
+                f"{(attempt.score / attempt.max_score * 100):.2f}%" if attempt.score is not None and attempt.max_score else "0%",
+                attempt.completed_at.strftime('%Y-%m-%d %H:%M:%S') if attempt.completed_at else 'Not completed',
+                f"{_minutes_taken(attempt):.2f} minutes"
+            ] for attempt in batch]
+    
+    header = ['Student', 'Score', 'Max Score', 'Percentage', 'Attempt Date', 'Time Taken']
+    return streaming_download(csv_chunks(header, rows()), f'quiz_{quiz_id}_results.csv', compress=wants_gzip())
+
+def _feedback_state(quiz_id):
+    """(count, newest id) of a quiz's feedback, for page validators."""
+    return tuple(db.session.query(db.func.count(QuizFeedback.id), db.func.max(QuizFeedback.id))
+                 .filter(QuizFeedback.quiz_id == quiz_id).one())
+
+def _minutes_taken(attempt):
+    return (attempt.completed_at - attempt.started_at).total_seconds() / 60 if attempt.completed_at else 0
+
+@quiz_bp.route('/quiz/export/answers')
+@login_required
+def export_answers():
+    """Every answer to the teacher's quizzes in long format (CSV or NDJSON), optionally by category."""
+    if not current_user.is_teacher:
+        flash('Only teachers can export answers.', 'danger')
+        return redirect(url_for('main.index'))
     
-    # Create CSV data
-    output = StringIO()
-    writer = csv.writer(output)
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        flash('Unknown export format.', 'danger')
+        return redirect(url_for('main.history'))
     
-    # Write header
-    writer.writerow(['Student', 'Score', 'Max Score', 'Percentage', 'Attempt Date', 'Time Taken'])
+    category = request.args.get('category')
+    statement = answer_export_statement(author_id=current_user.id, category=category)
+    filename = f"answers_{category or 'all'}.{export_format}"
+    mimetype = 'application/x-ndjson' if export_format == 'ndjson' else 'text/csv'
+    return streaming_download(answer_export_chunks(statement, export_format), filename,
+                              mimetype=mimetype, compress=wants_gzip())
+
+@quiz_bp.route('/quiz/<int:quiz_id>/distractors/export')
+@login_required
+def export_distractors(quiz_id):
+    quiz = Quiz.query.get_or_404(quiz_id)
+    if quiz.author_id != current_user.id and not current_user.is_teacher:
+        flash('You do not have permission to export these results.', 'danger')
+        return redirect(url_for('main.index'))
     
-    # Write data
-    for attempt in attempts:
-        student = User.query.get(attempt.student_id)
-        time_taken = (attempt.completed_at - attempt.started_at).total_seconds() / 60 if attempt.completed_at else 0
-        writer.writerow([
-            student.username,
-            attempt.score,
-            attempt.max_score,
-            f"{(attempt.score / attempt.max_score * 100):.2f}%" if attempt.max_score > 0 else "0%",
-            attempt.completed_at.strftime('%Y-%m-%d %H:%M:%S') if attempt.completed_at else 'Not completed',
-            f"{time_taken:.2f} minutes"
-        ])
-    
-    output.seek(0)
-    return Response(
-        output,
-        mimetype='text/csv',
-        headers={
-            'Content-Disposition': f'attachment; filename=quiz_{quiz_id}_results.csv'
-        }
-    )
+    rows = []
+    for item in analytics.distractor_report(quiz):
+        for row in item['options']:
+            rows.append([item['question'].text, row['option'].text, 'Yes' if row['option'].is_correct else 'No']
+                        + row['quartiles'] + [row['total'], row['flag'] or ''])
+        if sum(item['skipped']):
+            rows.append([item['question'].text, '(no answer)', ''] + item['skipped'] + [sum(item['skipped']), ''])
+    
+    header = ['Question', 'Option', 'Correct', 'Q1 (lowest scores)', 'Q2', 'Q3', 'Q4 (highest scores)', 'Total', 'Flag']
+    return streaming_download(csv_chunks(header, [rows]), f'quiz_{quiz_id}_distractors.csv', compress=wants_gzip())
 
 @quiz_bp.route('/quiz/<int:quiz_id>/feedback', methods=['GET', 'POST'])
 @login_required
@@ -741,7 +799,7 @@ def student_dashboard():
     # Get all quizzes the student has access to
     accessible_quizzes = Quiz.query.filter(
         (Quiz.is_public == True) |  # Public quizzes
-        (Quiz.id.in_([q.id for q in current_user.shared_quizzes]))  # Shared quizzes
+        (Quiz.id.in_(select(shared_quizzes.c.quiz_id).where(shared_quizzes.c.user_id == current_user.id)))  # Shared quizzes
     ).all()
     
     # Filter out quizzes that the student has already attempted
@@ -759,15 +817,9 @@ def student_dashboard():
         if attempt.quiz_id not in latest_attempts or attempt.completed_at > latest_attempts[attempt.quiz_id].completed_at:
             latest_attempts[attempt.quiz_id] = attempt
     
-    # Convert attempts to quiz objects with their latest attempt
-    completed_quizzes = []
-    for attempt in latest_attempts.values():
-        quiz = attempt.quiz
-        quiz.attempts = [attempt]  # Add the latest attempt to the quiz object
-        completed_quizzes.append(quiz)
-    
-    # Sort completed quizzes by completion date
-    completed_quizzes.sort(key=lambda q: q.attempts[0].completed_at, reverse=True)
+    # Latest attempt per quiz, most recently completed first. Assigning to
+    # quiz.attempts here would orphan (and on flush delete) the other attempts.
+    completed_quizzes = sorted(latest_attempts.values(), key=lambda a: a.completed_at, reverse=True)
     
     return render_template('student/dashboard.html',
                          in_progress_quizzes=in_progress_quizzes,
@@ -783,9 +835,9 @@ def quiz_history():
         flash('Access denied.', 'danger')
         return redirect(url_for('main.index'))
     
-    # Get all attempts by the student, ordered by most recent first
-    attempts = QuizAttempt.query.filter_by(student_id=current_user.id)\
-        .order_by(QuizAttempt.started_at.desc()).all()
+    # Get the student's attempts, most recent first, one page at a time
+    attempts = page_from_request(QuizAttempt.query.filter_by(student_id=current_user.id),
+                                 (QuizAttempt.started_at, QuizAttempt.id))
     
     return render_template('student/history.html', attempts=attempts)
 
@@ -797,55 +849,54 @@ def export_attempt_results(attempt_id):
         flash('You do not have permission to export these results.', 'danger')
         return redirect(url_for('main.index'))
     
-    # Create CSV data
-    output = StringIO()
-    writer = csv.writer(output)
-    
-    # Write header
-    writer.writerow(['Quiz Title', 'Student', 'Score', 'Max Score', 'Percentage', 'Completion Date', 'Time Taken'])
-    
-    # Write attempt data
-    student = User.query.get(attempt.student_id)
-    time_taken = (attempt.completed_at - attempt.started_at).total_seconds() / 60 if attempt.completed_at else 0
-    writer.writerow([
-        attempt.quiz.title,
-        student.username,
-        attempt.score,
-        attempt.max_score,
-        f"{(attempt.score / attempt.max_score * 100):.2f}%" if attempt.max_score > 0 else "0%",
-        attempt.completed_at.strftime('%Y-%m-%d %H:%M:%S') if attempt.completed_at else 'Not completed',
-        f"{time_taken:.2f} minutes"
-    ])
-    
-    # Add a blank line
-    writer.writerow([])
-    
-    # Write question-wise breakdown
-    writer.writerow(['Question', 'Type', 'Your Answer', 'Correct Answer', 'Points Earned', 'Max Points', 'Result'])
-    
-    for answer in attempt.answers:
-        if answer.question.question_type == 'mcq':
-            student_answer = answer.selected_option.text if answer.selected_option else "No answer"
-            correct_answer = next((opt.text for opt in answer.question.options if opt.is_correct), "No correct answer")
-        else:  # descriptive
-            student_answer = answer.text_answer or "No answer"
-            correct_answer = answer.question.options[0].text if answer.question.options else "No correct answer"
+    def chunks():
+        student = User.query.get(attempt.student_id)
+        summary = [[
+            attempt.quiz.title,
+            student.username,
+            attempt.score,
+            attempt.max_score,
+            f"{(attempt.score / attempt.max_score * 100):.2f}%" if attempt.score is not None and attempt.max_score else "0%",
+            attempt.completed_at.strftime('%Y-%m-%d %H:%M:%S') if attempt.completed_at else 'Not completed',
+            f"{_minutes_taken(attempt):.2f} minutes"
+        ], []]  # followed by a blank line
+        yield from csv_chunks(['Quiz Title', 'Student', 'Score', 'Max Score', 'Percentage', 'Completion Date', 'Time Taken'],
+                              [summary])
+        
+        # Correct answers for all questions of the quiz in one query:
+        # the correct option for MCQs, the first option for descriptive questions
+        correct_answers = {}
+        for question_id, question_type, text, is_correct in db.session.execute(
+                select(QuestionOption.question_id, Question.question_type, QuestionOption.text, QuestionOption.is_correct)
+                .join(Question, Question.id == QuestionOption.question_id)
+                .where(Question.quiz_id == attempt.quiz_id)
+                .order_by(QuestionOption.order, QuestionOption.id)):
+            if question_id in correct_answers:
+                continue
+            if question_type != 'mcq' or is_correct:
+                correct_answers[question_id] = text
         
-        writer.writerow([
-            answer.question.text,
-            answer.question.question_type.upper(),
-            student_answer,
-            correct_answer,
-            answer.points_earned,
-            answer.question.points,
-            "Correct" if answer.is_correct else "Incorrect"
-        ])
-    
-    output.seek(0)
-    return Response(
-        output,
-        mimetype='text/csv',
-        headers={
-            'Content-Disposition': f'attachment; filename=quiz_attempt_{attempt_id}_results.csv'
-        }
-    ) 
\ No newline at end of file
+        # Question-wise breakdown from joined answer + question + selected option rows
+        statement = select(
+            Answer.id, Answer.text_answer, Answer.points_earned, Answer.is_correct,
+            Question.id.label('question_id'), Question.text, Question.question_type, Question.points,
+            QuestionOption.text.label('selected_text')
+        ).join(Question, Question.id == Answer.question_id)\
+            .outerjoin(QuestionOption, QuestionOption.id == Answer.selected_option_id)\
+            .where(Answer.attempt_id == attempt_id)
+        
+        def rows():
+            for batch in keyset_batches(statement, Answer.id):
+                yield [[
+                    answer.text,
+                    answer.question_type.upper(),
+                    (answer.selected_text or "No answer") if answer.question_type == 'mcq' else (answer.text_answer or "No answer"),
+                    correct_answers.get(answer.question_id, "No correct answer"),
+                    answer.points_earned,
+                    answer.points,
+                    "Correct" if answer.is_correct else "Incorrect"
+                ] for answer in batch]
+        
+        yield from csv_chunks(['Question', 'Type', 'Your Answer', 'Correct Answer', 'Points Earned', 'Max Points', 'Result'], rows())
+    
+    return streaming_download(chunks(), f'quiz_attempt_{attempt_id}_results.csv', compress=wants_gzip())
@@ -1,7 +1,9 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_required, current_user
 from app.models.quiz import Quiz, QuizAttempt
+from app.models.quiz_stats import QuizStats
 from app.models.user import User
+from app.utils.analytics import question_answer_counts
 from app import db
 from datetime import datetime
 
@@ -17,33 +19,22 @@ def dashboard():
     # Get all quizzes created by the teacher
     quizzes = Quiz.query.filter_by(author_id=current_user.id).all()
     
-    # Calculate statistics for each quiz
+    # Read the precomputed statistics for all quizzes in one query
+    stats_by_quiz = QuizStats.for_quizzes(quiz.id for quiz in quizzes)
     quiz_stats = []
     for quiz in quizzes:
-        attempts = quiz.attempts  # This is already a list
-        total_attempts = len(attempts)
-        if total_attempts > 0:
-            scores = [attempt.score for attempt in attempts if attempt.score is not None]
-            avg_score = sum(scores) / len(scores) if scores else 0
-            max_score = sum(question.points for question in quiz.questions)
-            highest_score = max(scores) if scores else 0
-            lowest_score = min(scores) if scores else 0
-        else:
-            avg_score = 0
-            max_score = sum(question.points for question in quiz.questions)
-            highest_score = 0
-            lowest_score = 0
-        
+        stats = stats_by_quiz[quiz.id]
         quiz_stats.append({
             'quiz': quiz,
-            'total_attempts': total_attempts,
-            'avg_score': avg_score,
-            'max_score': max_score,
-            'highest_score': highest_score,
-            'lowest_score': lowest_score
+            'total_attempts': stats.attempt_count,
+            'avg_score': stats.avg_score,
+            'max_score': stats.total_points,
+            'highest_score': stats.highest_score or 0,
+            'lowest_score': stats.lowest_score or 0,
+            'avg_percentage': stats.avg_percentage
         })
     
-    return render_template('teacher/dashboard.html', quiz_stats=quiz_stats)
+    return render_template('teacher/dashboard.html', quiz_stats=quiz_stats, now=datetime.utcnow())
 
 @teacher_bp.route('/quiz/<int:quiz_id>/results')
 @login_required
@@ -57,7 +48,7 @@ def quiz_results(quiz_id):
         flash('Access denied. You can only view results for your own quizzes.', 'danger')
         return redirect(url_for('teacher.dashboard'))
     
-    attempts = quiz.attempts.all()
+    attempts = quiz.attempts
     total_attempts = len(attempts)
     
     # Calculate statistics
@@ -69,12 +60,11 @@ def quiz_results(quiz_id):
     else:
         avg_score = highest_score = lowest_score = 0
     
-    # Calculate question-wise statistics
+    # Calculate question-wise statistics with one grouped query
+    answer_counts = question_answer_counts(quiz.id)
     question_stats = []
     for question in quiz.questions:
-        correct_answers = sum(1 for attempt in attempts 
-                            for answer in attempt.answers 
-                            if answer.question_id == question.id and answer.is_correct)
+        correct_answers = answer_counts.get(question.id, (0, 0))[0]
         success_rate = (correct_answers / total_attempts * 100) if total_attempts > 0 else 0
         
         question_stats.append({
@@ -3,6 +3,7 @@ from flask_login import current_user, login_required
 from app import db
 from app.models.user import User
 from app.forms.auth import UpdateProfileForm
+from app.utils.access import access_cache
 
 user_bp = Blueprint('user', __name__)
 
@@ -24,6 +25,7 @@ def edit_profile(username):
         current_user.username = form.username.data
         current_user.bio = form.bio.data
         db.session.commit()
+        access_cache.forget_user(current_user.id)
         flash('Your profile has been updated.', 'success')
         return redirect(url_for('user.profile', username=current_user.username))
     elif request.method == 'GET':
@@ -0,0 +1,169 @@
+"""Shared helpers for the benchmark scripts.
+
+Every benchmark runs against a throwaway SQLite database so results are
+reproducible and never touch quizwizz.db.
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+
+
+def make_config(db_path=None, base=Config, **overrides):
+    """Return a config class (derived from base) pointing at a temporary database."""
+    if db_path is None:
+        db_path = os.path.join(tempfile.mkdtemp(prefix='quizwizz-bench-'), 'bench.db')
+    attrs = {
+        'SQLALCHEMY_DATABASE_URI': 'sqlite:///' + db_path,
+        'WTF_CSRF_ENABLED': False,
+        'MAIL_SERVER': None,
+        'SKIP_SCHEMA_CHECK': True,
+        'SQL_DEBUG_HEADERS': True,  # statement counts in X-DB-Query-Count
+    }
+    attrs.update(overrides)
+    return type('BenchConfig', (base,), attrs)
+
+
+def make_app(db_path=None, base=Config, **overrides):
+    """Create an app bound to a fresh benchmark database with the schema fully migrated."""
+    from app import create_app, db
+    from app.utils.schema import upgrade
+    app = create_app(make_config(db_path, base, **overrides))
+    with app.app_context():
+        upgrade(db.engine, log=lambda message: None)
+    return app
+
+
+def create_quiz(author_id, num_questions, descriptive_every=5, options_per_question=4):
+    """Create and commit a quiz with a mix of MCQ and descriptive questions."""
+    from app import db
+    from app.models.quiz import Quiz, Question, QuestionOption
+    now = datetime.now()
+    quiz = Quiz(title=f'Benchmark quiz ({num_questions} questions)', author_id=author_id,
+                category='general_knowledge', start_time=now - timedelta(days=1),
+                end_time=now + timedelta(days=1), max_attempts=1000000)
+    db.session.add(quiz)
+    for q_index in range(num_questions):
+        descriptive = descriptive_every and (q_index + 1) % descriptive_every == 0
+        question = Question(text=f'Question {q_index + 1}', points=1 + q_index % 3,
+                            question_type='descriptive' if descriptive else 'mcq',
+                            order=q_index + 1, quiz=quiz)
+        db.session.add(question)
+        for o_index in range(1 if descriptive else options_per_question):
+            db.session.add(QuestionOption(text=f'Answer {o_index + 1}', is_correct=o_index == 0,
+                                          order=o_index + 1, question=question))
+    db.session.commit()
+    return quiz
+
+
+def create_user(username, is_teacher=False, password='password'):
+    """Create and commit a user."""
+    from app import db
+    from app.models.user import User
+    user = User(username=username, email=f'{username}@example.com', is_teacher=is_teacher)
+    user.set_password(password)
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def form_for(quiz, pick=0):
+    """Build a submission form that answers every question of a quiz."""
+    form = {}
+    for question in quiz.questions:
+        options = sorted(question.options, key=lambda o: o.order)
+        if question.question_type == 'mcq':
+            form[f'question_{question.id}'] = str(options[pick % len(options)].id)
+        else:
+            form[f'question_{question.id}'] = options[0].text if pick % 2 == 0 else 'wrong'
+    return form
+
+
+class StatementCounter:
+    """Count SQL statements executed on an engine while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        from sqlalchemy import event
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        from sqlalchemy import event
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def timed(fn, repeat):
+    """Run fn repeat times and return the per-call timings in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def seed_attempts(quiz_id, num_attempts, seed=0):
+    """Bulk-insert one graded, completed attempt per new student for a quiz."""
+    import random
+    from app import db
+    from app.models.quiz import Quiz, QuizAttempt, Answer
+    from app.models.user import User
+    from app.utils.grading import get_answer_key
+
+    rng = random.Random(seed)
+    quiz = Quiz.query.get(quiz_id)
+    answer_key = get_answer_key(quiz)
+    first_user_id = (db.session.query(db.func.max(User.id)).scalar() or 0) + 1
+    first_attempt_id = (db.session.query(db.func.max(QuizAttempt.id)).scalar() or 0) + 1
+    now = datetime.utcnow()
+
+    users, attempts, answers = [], [], []
+    for index in range(num_attempts):
+        user_id, attempt_id = first_user_id + index, first_attempt_id + index
+        users.append({'id': user_id, 'username': f'seed_{quiz_id}_{user_id}',
+                      'email': f'seed_{quiz_id}_{user_id}@example.com', 'role': 'student',
+                      'is_teacher': False, 'password_hash': ''})
+        # Students differ in ability so item statistics have some signal
+        ability = rng.random()
+        form = {}
+        for question_id, question_type, _ in answer_key.questions:
+            correct = rng.random() < ability
+            if question_type == 'mcq':
+                right = [o for o, ok in answer_key.options[question_id].items() if ok]
+                wrong = [o for o, ok in answer_key.options[question_id].items() if not ok]
+                form[f'question_{question_id}'] = str(rng.choice(right if correct or not wrong else wrong))
+            else:
+                form[f'question_{question_id}'] = answer_key.descriptive_keys[question_id] if correct else 'wrong'
+        rows = answer_key.collect(attempt_id, form)
+        score = answer_key.score(rows)
+        answers.extend(rows)
+        started = now - timedelta(minutes=rng.randint(5, 600))
+        attempts.append({'id': attempt_id, 'quiz_id': quiz_id, 'student_id': user_id, 'started_at': started,
+                         'completed_at': started + timedelta(minutes=rng.randint(1, 30)), 'completed': True,
+                         'score': score, 'max_score': answer_key.total_points})
+
+    db.session.execute(User.__table__.insert(), users)
+    db.session.execute(QuizAttempt.__table__.insert(), attempts)
+    db.session.execute(Answer.__table__.insert(), answers)
+    db.session.commit()
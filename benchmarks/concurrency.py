@@ -0,0 +1,90 @@
+"""Concurrent quiz submissions: default SQLite settings vs. the production profile.
+
+Each thread logs in as its own student and repeatedly starts and submits an
+attempt through the full take_quiz view, as simultaneous students would.
+
+    python -m benchmarks.concurrency --threads 8 --submissions 25
+"""
+import argparse
+import contextlib
+import io
+import threading
+import time
+
+from flask import got_request_exception
+
+from benchmarks.common import make_app, create_user, create_quiz, form_for, percentile
+from config import Config, ProductionConfig
+
+
+def run(base, threads, submissions, num_questions):
+    from app import db
+    from app.models.quiz import Quiz, QuizAttempt
+
+    app = make_app(base=base, GRADING_MODE='sync')
+    with app.app_context():
+        teacher_id = create_user('bench_teacher', is_teacher=True).id
+        quiz_id = create_quiz(teacher_id, num_questions).id
+        form = form_for(Quiz.query.get(quiz_id))
+        for index in range(threads):
+            create_user(f'bench_student_{index}')
+        db.session.remove()
+
+    errors = {'locked': 0, 'other': 0}
+    errors_lock = threading.Lock()
+
+    def on_exception(sender, exception, **extra):
+        with errors_lock:
+            errors['locked' if 'locked' in str(exception) else 'other'] += 1
+
+    got_request_exception.connect(on_exception, app)
+    app.logger.disabled = True  # failures are counted, not logged
+    latencies = []
+    barrier = threading.Barrier(threads + 1)
+
+    def student(index):
+        client = app.test_client()
+        client.post('/login', data={'email': f'bench_student_{index}@example.com', 'password': 'password'})
+        barrier.wait()
+        for _ in range(submissions):
+            start = time.perf_counter()
+            client.get(f'/quiz/quiz/{quiz_id}/take')  # starts the attempt
+            client.post(f'/quiz/quiz/{quiz_id}/take', data=form)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    workers = [threading.Thread(target=student, args=(index,)) for index in range(threads)]
+    # Without a mail server the result emails are printed; keep them out of the report
+    with contextlib.redirect_stdout(io.StringIO()):
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+    got_request_exception.disconnect(on_exception, app)
+
+    with app.app_context():
+        completed = QuizAttempt.query.filter(QuizAttempt.completed_at.isnot(None)).count()
+        db.session.remove()
+        db.get_engine(app).dispose()
+    return completed, elapsed, latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--submissions', type=int, default=25, help='Submissions per thread.')
+    parser.add_argument('--questions', type=int, default=20)
+    args = parser.parse_args()
+
+    print(f'{args.threads} threads x {args.submissions} submissions, {args.questions} questions')
+    print(f'{"profile":<12} {"completed":>9} {"subm/s":>8} {"p50 ms":>8} {"p95 ms":>8} {"locked":>7} {"other":>6}')
+    for label, base in (('default', Config), ('production', ProductionConfig)):
+        completed, elapsed, latencies, errors = run(base, args.threads, args.submissions, args.questions)
+        print(f'{label:<12} {completed:>9} {completed / elapsed:>8.1f} {percentile(latencies, 50):>8.1f} '
+              f'{percentile(latencies, 95):>8.1f} {errors["locked"]:>7} {errors["other"]:>6}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""Latency and query counts of the hot views against seeded data, with a baseline to compare to.
+
+    python -m benchmarks.endpoints --save baseline.json
+    python -m benchmarks.endpoints --compare baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+from datetime import datetime
+
+from benchmarks.common import make_app, create_quiz, form_for, percentile
+
+
+def pick_subjects():
+    """(teacher username, student username, results quiz id, public quiz id) from the seeded data."""
+    from app import db
+    from app.models.quiz import Quiz, QuizAttempt
+    from app.models.user import User
+
+    attempts = db.func.count(QuizAttempt.id)
+    popular_quiz = db.session.query(Quiz).join(QuizAttempt).group_by(Quiz.id)\
+        .order_by(attempts.desc(), Quiz.id).first()
+    public_quiz = db.session.query(Quiz).join(QuizAttempt).filter(Quiz.is_public == True)\
+        .group_by(Quiz.id).order_by(attempts.desc(), Quiz.id).first()
+    student = db.session.query(User).join(QuizAttempt, QuizAttempt.student_id == User.id)\
+        .group_by(User.id).order_by(attempts.desc(), User.id).first()
+    return popular_quiz.author.username, student.username, popular_quiz.id, public_quiz.id
+
+
+def measure(client, method, url, repeat, warmup, data=None):
+    """Timings (ms) and median statement count of repeated requests."""
+    timings, queries = [], []
+    for index in range(warmup + repeat):
+        start = time.perf_counter()
+        response = client.open(url, method=method, data=data)
+        response.get_data()  # streamed responses (CSV exports) are only built while being read
+        response.close()
+        elapsed = (time.perf_counter() - start) * 1000
+        assert response.status_code in (200, 302), (method, url, response.status_code)
+        if index >= warmup:
+            timings.append(elapsed)
+            queries.append(int(response.headers.get('X-DB-Query-Count', 0)))
+    return {
+        'p50_ms': round(percentile(timings, 50), 2),
+        'p95_ms': round(percentile(timings, 95), 2),
+        'p99_ms': round(percentile(timings, 99), 2),
+        'queries': sorted(queries)[len(queries) // 2],
+    }
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Print each endpoint against the baseline; return the names that regressed."""
+    regressions = []
+    print(f'\n{"endpoint":<26} {"p50 ms":>16} {"p95 ms":>16} {"queries":>10}')
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            print(f'{name:<26} {"(not in baseline)":>16}')
+            continue
+        flags = []
+        for metric in ('p50_ms', 'p95_ms'):
+            delta = current[metric] - previous[metric]
+            if delta > min_delta_ms and current[metric] > previous[metric] * (1 + threshold):
+                flags.append(metric[:3])
+        if current['queries'] > previous['queries']:
+            flags.append('queries')
+        cells = [f'{previous[metric]:>7.1f} -> {current[metric]:<6.1f}' for metric in ('p50_ms', 'p95_ms')]
+        line = f'{name:<26} {cells[0]:>16} {cells[1]:>16} {previous["queries"]:>4} -> {current["queries"]:<4}'
+        if flags:
+            regressions.append(name)
+            line += '  REGRESSION (' + ', '.join(flags) + ')'
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=['small', 'medium', 'large'], default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--warmup', type=int, default=3)
+    parser.add_argument('--save', metavar='PATH', help='Write the results to this JSON baseline file.')
+    parser.add_argument('--compare', metavar='PATH', help='Compare against a saved baseline; exit 1 on regressions.')
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help='Relative latency increase that counts as a regression (default 0.25 = 25%%).')
+    parser.add_argument('--min-delta-ms', type=float, default=2.0,
+                        help='Ignore latency increases smaller than this, however large relatively.')
+    args = parser.parse_args()
+
+    from app import db
+    from app.models.quiz import Quiz
+    from app.models.user import User
+    from app.utils.seed import SCALES, SEED_PASSWORD, seed_database
+
+    app = make_app(GRADING_MODE='sync')
+    with app.app_context():
+        seed_database(seed=args.seed, log=lambda message: None, **SCALES[args.scale])
+        teacher, student, results_quiz_id, public_quiz_id = pick_subjects()
+        # A fresh open quiz that accepts any number of attempts, for take_quiz
+        take_quiz_id = create_quiz(User.query.filter_by(username=teacher).one().id, 20).id
+        form = form_for(Quiz.query.get(take_quiz_id))
+        db.session.remove()
+
+    clients = {}
+    for username in (teacher, student):
+        clients[username] = app.test_client()
+        clients[username].post('/login', data={'email': f'{username}@example.com', 'password': SEED_PASSWORD})
+
+    cases = [
+        ('take_quiz GET', student, 'GET', f'/quiz/quiz/{take_quiz_id}/take', None),
+        ('take_quiz POST', student, 'POST', f'/quiz/quiz/{take_quiz_id}/take', form),
+        ('view_quiz', student, 'GET', f'/quiz/quiz/{public_quiz_id}', None),
+        ('quiz_results', teacher, 'GET', f'/quiz/quiz/{results_quiz_id}/results', None),
+        ('export_results', teacher, 'GET', f'/quiz/quiz/{results_quiz_id}/export', None),
+        ('main.student_home', student, 'GET', '/student', None),
+        ('main.teacher_home', teacher, 'GET', '/teacher', None),
+        ('quiz.student_dashboard', student, 'GET', '/quiz/student/dashboard', None),
+        ('search_quizzes', student, 'GET', '/quiz/quiz/search?search=history', None),
+    ]
+    results = {}
+    print(f'{args.scale} dataset, {args.repeat} requests each')
+    print(f'{"endpoint":<26} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"queries":>8}')
+    with contextlib.redirect_stdout(io.StringIO()):  # result emails are printed without a mail server
+        for name, username, method, url, data in cases:
+            results[name] = result = measure(clients[username], method, url, args.repeat, args.warmup, data)
+            sys.__stdout__.write(f'{name:<26} {result["p50_ms"]:>8.1f} {result["p95_ms"]:>8.1f} '
+                                 f'{result["p99_ms"]:>8.1f} {result["queries"]:>8}\n')
+
+    meta = {'scale': args.scale, 'seed': args.seed, 'repeat': args.repeat, 'python': platform.python_version(),
+            'created_at': datetime.utcnow().isoformat(timespec='seconds')}
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'meta': meta, 'results': results}, f, indent=2)
+        print(f'Saved baseline to {args.save}')
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if (baseline['meta']['scale'], baseline['meta']['seed']) != (args.scale, args.seed):
+            print(f'Warning: baseline was recorded at scale {baseline["meta"]["scale"]}, '
+                  f'seed {baseline["meta"]["seed"]}')
+        regressions = compare(results, baseline['results'], args.threshold, args.min_delta_ms)
+        if regressions:
+            print(f'\n{len(regressions)} endpoint(s) regressed.')
+            sys.exit(1)
+        print('\nNo regressions.')
+
+
+if __name__ == '__main__':
+    main()
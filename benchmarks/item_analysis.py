@@ -0,0 +1,84 @@
+"""Item analysis (difficulty, discrimination, point-biserial, Cronbach's alpha) at scale.
+
+Times loading the score matrix and computing the statistics with NumPy,
+against a plain Python double loop over the same matrix.
+
+    python -m benchmarks.item_analysis --questions 50 --attempts 10000
+"""
+import argparse
+import time
+from math import sqrt
+
+from benchmarks.common import make_app, create_user, create_quiz, seed_attempts
+
+
+def python_item_analysis(rows, points):
+    """Reference implementation with nested loops over a list-of-lists matrix."""
+    num_attempts, num_questions = len(rows), len(points)
+    totals = [sum(row) for row in rows]
+    difficulty, point_biserial = [], []
+    for j in range(num_questions):
+        column = [row[j] for row in rows]
+        difficulty.append(sum(column) / num_attempts / points[j] if points[j] else 0)
+        rest = [totals[i] - column[i] for i in range(num_attempts)]
+        mean_x, mean_y = sum(column) / num_attempts, sum(rest) / num_attempts
+        cov = sum((column[i] - mean_x) * (rest[i] - mean_y) for i in range(num_attempts))
+        var_x = sum((value - mean_x) ** 2 for value in column)
+        var_y = sum((value - mean_y) ** 2 for value in rest)
+        point_biserial.append(cov / sqrt(var_x * var_y) if var_x and var_y else float('nan'))
+
+    def variance(values):
+        mean = sum(values) / len(values)
+        return sum((value - mean) ** 2 for value in values) / (len(values) - 1)
+
+    item_variance = sum(variance([row[j] for row in rows]) for j in range(num_questions))
+    alpha = num_questions / (num_questions - 1) * (1 - item_variance / variance(totals))
+    return difficulty, point_biserial, alpha
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--attempts', type=int, default=10000)
+    args = parser.parse_args()
+
+    from app.models.quiz import Quiz
+    from app.utils.analytics import ItemAnalysis, score_matrix
+
+    app = make_app()
+    with app.app_context():
+        teacher_id = create_user('bench_teacher', is_teacher=True).id
+        quiz_id = create_quiz(teacher_id, args.questions).id
+        start = time.perf_counter()
+        seed_attempts(quiz_id, args.attempts)
+        print(f'Seeded {args.attempts} attempts x {args.questions} questions '
+              f'in {time.perf_counter() - start:.1f} s')
+
+        quiz = Quiz.query.get(quiz_id)
+        question_ids = [question.id for question in quiz.questions]
+        points = [question.points for question in quiz.questions]
+
+        start = time.perf_counter()
+        _, matrix = score_matrix(quiz_id, question_ids)
+        load_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        analysis = ItemAnalysis(question_ids, points, matrix)
+        numpy_ms = (time.perf_counter() - start) * 1000
+
+        rows = matrix.tolist()
+        start = time.perf_counter()
+        difficulty, point_biserial, alpha = python_item_analysis(rows, points)
+        python_ms = (time.perf_counter() - start) * 1000
+
+        print(f'load score matrix   {load_ms:>10.1f} ms')
+        print(f'numpy statistics    {numpy_ms:>10.1f} ms')
+        print(f'python double loop  {python_ms:>10.1f} ms')
+        print(f"Cronbach's alpha    {analysis.alpha:.4f} (python {alpha:.4f})")
+        drift = max(abs(a - b) for a, b in zip(analysis.difficulty.tolist(), difficulty))
+        drift = max(drift, max(abs(a - b) for a, b in zip(analysis.point_biserial.tolist(), point_biserial)))
+        print(f'max difference vs python: {drift:.2e}')
+
+
+if __name__ == '__main__':
+    main()
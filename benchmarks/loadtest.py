@@ -0,0 +1,274 @@
+"""Exam-peak load test: many students log in, open a quiz together and submit within a short window.
+
+Runs against a live server (not the test client) using the database the
+server uses, so it measures the real SQLite profile, grading mode and worker
+count. On one box:
+
+    export FLASK_APP=run.py FLASK_CONFIG=production
+    python -m benchmarks.loadtest prepare --students 1000
+    gunicorn -w 4 --threads 8 run:app 2> server.log     # or: flask run --with-threads
+    python -m benchmarks.loadtest run --quiz-id <id> --students 1000 --server-log server.log
+"""
+import argparse
+import os
+import random
+import re
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import Counter
+from http.cookiejar import CookieJar
+
+from benchmarks.common import percentile
+
+USERNAME = 'loadtest_{:05d}'
+PASSWORD = 'password'
+
+_CSRF = re.compile(r'name="csrf_token"[^>]*?value="([^"]*)"')
+_RADIO = re.compile(r'name="question_(\d+)"\s+value="(\d+)"')
+_TEXTAREA = re.compile(r'<textarea[^>]*?name="question_(\d+)"', re.S)
+
+
+def load_app():
+    """The app as the server runs it (FLASK_CONFIG and DATABASE_URL from the environment)."""
+    from app import create_app
+    from config import config
+    return create_app(config[os.environ.get('FLASK_CONFIG') or 'default'])
+
+
+def prepare(args):
+    """Create the student accounts (if missing) and a fresh exam quiz; print its id."""
+    from datetime import datetime, timedelta
+    from werkzeug.security import generate_password_hash
+    from app import db
+    from app.models.user import User
+    from benchmarks.common import create_quiz, create_user
+
+    app = load_app()
+    with app.app_context():
+        teacher = User.query.filter_by(username='loadtest_teacher').first() or \
+            create_user('loadtest_teacher', is_teacher=True, password=PASSWORD)
+        existing = {name for (name,) in db.session.query(User.username).filter(User.username.like('loadtest_0%'))}
+        password_hash = generate_password_hash(PASSWORD)
+        rows = [{'username': USERNAME.format(index), 'email': USERNAME.format(index) + '@example.com',
+                 'password_hash': password_hash, 'role': 'student', 'is_teacher': False}
+                for index in range(1, args.students + 1) if USERNAME.format(index) not in existing]
+        if rows:
+            db.session.execute(User.__table__.insert(), rows)
+            db.session.commit()
+
+        quiz = create_quiz(teacher.id, args.questions)
+        quiz.title = 'Load test exam'
+        quiz.max_attempts = 1
+        quiz.start_time = datetime.now() - timedelta(minutes=1)
+        quiz.end_time = datetime.now() + timedelta(hours=args.hours)
+        db.session.commit()
+        print(f'{len(rows)} students created ({args.students} total); exam quiz id {quiz.id}')
+
+
+class NoRedirect(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None  # report redirects as responses instead of following them
+
+
+class Results:
+    """Latencies and failures per phase, shared by every simulated student."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {'login': [], 'open': [], 'submit': []}
+        self.errors = Counter()
+        self.submitted = 0
+        self.submit_span = [None, None]
+
+    def record(self, phase, started, elapsed, error=None):
+        with self.lock:
+            self.latencies[phase].append(elapsed * 1000)
+            if error:
+                self.errors[f'{phase}: {error}'] += 1
+            if phase == 'submit':
+                first, last = self.submit_span
+                self.submit_span = [started if first is None else min(first, started),
+                                    max(last or 0, started + elapsed)]
+                if not error:
+                    self.submitted += 1
+
+
+class Student:
+    """One simulated student with its own cookie session."""
+
+    def __init__(self, base_url, index, timeout):
+        self.base_url = base_url.rstrip('/')
+        self.username = USERNAME.format(index)
+        self.timeout = timeout
+        self.opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(CookieJar()), NoRedirect)
+
+    def request(self, path, form=None):
+        """Return (status, body); 3xx responses are returned rather than followed."""
+        data = urllib.parse.urlencode(form).encode() if form is not None else None
+        try:
+            with self.opener.open(self.base_url + path, data=data, timeout=self.timeout) as response:
+                return response.status, response.read().decode('utf-8', 'replace')
+        except urllib.error.HTTPError as e:
+            return e.code, e.read().decode('utf-8', 'replace')
+
+    def login(self):
+        """Return (status, True if logged in)."""
+        status, body = self.request('/login')
+        token = _CSRF.search(body)
+        status, body = self.request('/login', {'email': self.username + '@example.com', 'password': PASSWORD,
+                                               'csrf_token': token.group(1) if token else ''})
+        return status, status == 302
+
+    def open_quiz(self, quiz_id, rng):
+        """Open the take page; return (status, submission form or None)."""
+        status, body = self.request(f'/quiz/quiz/{quiz_id}/take')
+        if status != 200:
+            return status, None
+        options = {}
+        for question_id, option_id in _RADIO.findall(body):
+            options.setdefault(question_id, []).append(option_id)
+        form = {f'question_{question_id}': rng.choice(option_ids) for question_id, option_ids in options.items()}
+        form.update({f'question_{question_id}': 'load test answer' for question_id in _TEXTAREA.findall(body)})
+        token = _CSRF.search(body)
+        form['csrf_token'] = token.group(1) if token else ''
+        return status, form
+
+    def submit(self, quiz_id, form):
+        """Return (status, True on a redirect). Repeat submissions are also redirected, so the
+        database check at the end is what tells whether any were accepted twice."""
+        status, body = self.request(f'/quiz/quiz/{quiz_id}/take', form)
+        return status, status == 302
+
+
+def timed_call(results, phase, fn, *args):
+    """Run one phase and record its latency. Returns (status, value), or None if it failed."""
+    started = time.perf_counter()
+    try:
+        status, value = fn(*args)
+        error = None
+    except (urllib.error.URLError, OSError) as e:
+        reason = getattr(e, 'reason', e)
+        status = value = None
+        error = 'timeout' if 'timed out' in str(reason) else type(reason).__name__
+    elapsed = time.perf_counter() - started
+    if error is None and not value:
+        error = f'HTTP {status}'
+    results.record(phase, started, elapsed, error)
+    return None if error else (status, value)
+
+
+def simulate(student, args, results, start_gate, rng):
+    try:
+        logged_in = timed_call(results, 'login', student.login)
+    finally:
+        start_gate.wait()  # the exam opens for everyone at once
+    if logged_in is None:
+        return
+
+    opened = timed_call(results, 'open', student.open_quiz, args.quiz_id, rng)
+    if opened is None:
+        return
+    form = opened[1]
+
+    # Answer, then submit somewhere in the closing window
+    time.sleep(args.think + rng.uniform(0, args.window))
+    clicks = 2 if rng.random() < args.double_click else 1  # impatient students submit twice
+    submitters = [threading.Thread(target=timed_call, args=(results, 'submit', student.submit, args.quiz_id, form))
+                  for _ in range(clicks)]
+    for thread in submitters:
+        thread.start()
+    for thread in submitters:
+        thread.join()
+
+
+def count_lock_errors(log_path, offset):
+    """Count "database is locked" lines written to the server log since offset."""
+    with open(log_path, 'rb') as f:
+        f.seek(offset)
+        return sum(line.count(b'database is locked') for line in f)
+
+
+def attempt_summary(quiz_id):
+    """(attempts, completed attempts, students with more than one attempt) read from the database."""
+    from app import db
+    from app.models.quiz import QuizAttempt
+    app = load_app()
+    with app.app_context():
+        total, completed = db.session.query(db.func.count(QuizAttempt.id), db.func.count(QuizAttempt.completed_at))\
+            .filter(QuizAttempt.quiz_id == quiz_id).one()
+        duplicates = db.session.query(QuizAttempt.student_id).filter(QuizAttempt.quiz_id == quiz_id)\
+            .group_by(QuizAttempt.student_id).having(db.func.count(QuizAttempt.id) > 1).count()
+    return total, completed, duplicates
+
+
+def run(args):
+    log_offset = os.path.getsize(args.server_log) if args.server_log else 0
+    results = Results()
+    start_gate = threading.Barrier(args.students + 1)
+    threads = []
+    for index in range(1, args.students + 1):
+        student = Student(args.url, index, args.timeout)
+        thread = threading.Thread(target=simulate, daemon=True,
+                                  args=(student, args, results, start_gate, random.Random(index)))
+        thread.start()
+        threads.append(thread)
+        time.sleep(args.ramp / args.students)  # logins trickle in before the exam opens
+    start_gate.wait()
+    print(f'{args.students} students have logged in; the exam is open')
+    for thread in threads:
+        thread.join()
+
+    print(f'\n{"phase":<8} {"requests":>9} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"max ms":>8}')
+    for phase, latencies in results.latencies.items():
+        print(f'{phase:<8} {len(latencies):>9} {percentile(latencies, 50):>8.0f} {percentile(latencies, 95):>8.0f} '
+              f'{percentile(latencies, 99):>8.0f} {max(latencies, default=0):>8.0f}')
+    first, last = results.submit_span
+    if first is not None:
+        print(f'\nSubmissions: {results.submitted} ok in {last - first:.1f} s '
+              f'({results.submitted / max(last - first, 1e-9):.1f}/s)')
+    print('Errors:' if results.errors else 'Errors: none')
+    for error, count in results.errors.most_common():
+        print(f'  {error}: {count}')
+    if args.server_log:
+        print(f'SQLite lock errors in server log: {count_lock_errors(args.server_log, log_offset)}')
+    if not args.no_db_check:
+        total, completed, duplicates = attempt_summary(args.quiz_id)
+        print(f'Attempts: {total} ({completed} submitted); students with duplicate attempts: {duplicates}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    prepare_parser = commands.add_parser('prepare', help='Create student accounts and an exam quiz.')
+    prepare_parser.add_argument('--students', type=int, default=1000)
+    prepare_parser.add_argument('--questions', type=int, default=20)
+    prepare_parser.add_argument('--hours', type=int, default=2, help='How long the exam stays open.')
+
+    run_parser = commands.add_parser('run', help='Drive a running server.')
+    run_parser.add_argument('--url', default='http://127.0.0.1:5000')
+    run_parser.add_argument('--quiz-id', type=int, required=True)
+    run_parser.add_argument('--students', type=int, default=1000)
+    run_parser.add_argument('--ramp', type=float, default=10.0, help='Seconds over which students log in.')
+    run_parser.add_argument('--think', type=float, default=5.0, help='Seconds every student spends answering.')
+    run_parser.add_argument('--window', type=float, default=10.0,
+                            help='Submissions are spread over this many seconds after the think time.')
+    run_parser.add_argument('--double-click', type=float, default=0.05,
+                            help='Share of students who submit twice at once.')
+    run_parser.add_argument('--timeout', type=float, default=60.0, help='Per-request timeout in seconds.')
+    run_parser.add_argument('--server-log', help="The server's stderr log, to count SQLite lock errors.")
+    run_parser.add_argument('--no-db-check', action='store_true',
+                            help='Skip counting attempts in the database (when it is not on this box).')
+
+    args = parser.parse_args()
+    if args.command == 'prepare':
+        prepare(args)
+    else:
+        run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""Fail when a hot query would read a whole table instead of using an index.
+
+Plans are checked on the freshly migrated schema, then again on seeded data
+after ANALYZE, when SQLite picks indexes from real table statistics. Exits
+with status 1 if any plan contains a full table scan.
+
+    python -m benchmarks.query_plans --scale small
+"""
+import argparse
+import sys
+
+from benchmarks.common import make_app
+
+
+def check(connection, label):
+    from app.utils.schema import full_table_scans, hot_queries
+    scans = full_table_scans(connection)
+    for name, step in scans:
+        print(f'FULL SCAN  {label}: {name}: {step}')
+    if not scans:
+        print(f'{label}: all {len(hot_queries())} hot queries use indexes')
+    return scans
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', choices=['small', 'medium', 'large'], default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    from app import db
+    from app.utils.seed import SCALES, seed_database
+
+    app = make_app()
+    with app.app_context():
+        with db.engine.connect() as connection:
+            scans = check(connection, 'empty schema')
+        seed_database(seed=args.seed, log=lambda message: None, **SCALES[args.scale])
+        with db.engine.connect() as connection:
+            connection.exec_driver_sql('ANALYZE')
+            scans += check(connection, f'{args.scale} dataset')
+    if scans:
+        print(f'\n{len(scans)} full table scan(s) in hot query plans.')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
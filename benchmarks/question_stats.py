@@ -0,0 +1,68 @@
+"""Question statistics for quiz_results: per-pair lookups vs. one grouped query.
+
+    python -m benchmarks.question_stats --questions 50 --attempts 2000
+"""
+import argparse
+import time
+
+from benchmarks.common import make_app, create_user, create_quiz, seed_attempts, StatementCounter
+
+
+def legacy_question_stats(quiz, attempts):
+    """The original question x attempt loop from quiz_results, kept here for comparison."""
+    from app.models.quiz import Answer
+    stats = []
+    for question in quiz.questions:
+        correct_answers = total_answers = 0
+        for attempt in attempts:
+            if attempt.completed_at:
+                answer = Answer.query.filter_by(attempt_id=attempt.id, question_id=question.id).first()
+                if answer:
+                    total_answers += 1
+                    if answer.is_correct:
+                        correct_answers += 1
+        stats.append((question.id, correct_answers, total_answers))
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=50)
+    parser.add_argument('--attempts', type=int, default=500)
+    parser.add_argument('--skip-legacy', action='store_true', help='Only time the grouped query.')
+    args = parser.parse_args()
+
+    from app import db
+    from app.models.quiz import Quiz, QuizAttempt
+    from app.utils import analytics
+
+    app = make_app()
+    with app.app_context():
+        teacher_id = create_user('bench_teacher', is_teacher=True).id
+        quiz_id = create_quiz(teacher_id, args.questions).id
+        seed_attempts(quiz_id, args.attempts)
+        print(f'Seeded {args.attempts} attempts x {args.questions} questions')
+
+        runs = [('grouped', lambda quiz, attempts: [
+            (s['question'].id, s['correct_count'], s['total_attempts']) for s in analytics.question_stats(quiz)])]
+        if not args.skip_legacy:
+            runs.insert(0, ('legacy', legacy_question_stats))
+
+        results = {}
+        for label, fn in runs:
+            db.session.remove()
+            quiz = Quiz.query.get(quiz_id)
+            attempts = QuizAttempt.query.filter_by(quiz_id=quiz_id).all()
+            quiz.questions  # load questions outside the measurement
+            with StatementCounter(db.engine) as counter:
+                start = time.perf_counter()
+                results[label] = fn(quiz, attempts)
+                elapsed = (time.perf_counter() - start) * 1000
+            print(f'{label:<8} {elapsed:>10.1f} ms {counter.count:>8} statements')
+
+        if len(results) == 2:
+            print('results match' if results['legacy'] == results['grouped'] else 'RESULTS DIFFER')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""SQL statements per render of the take, review and edit pages, with and without loader profiles.
+
+The take page is measured with an empty fragment cache, then once more with
+its question list cached.
+
+    python -m benchmarks.render_queries --questions 50
+"""
+import argparse
+import contextlib
+import io
+
+from benchmarks.common import make_app, create_user, create_quiz, form_for, StatementCounter
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, default=50)
+    args = parser.parse_args()
+
+    from app import db
+    from app.models.quiz import Quiz
+    from app.utils import loaders
+    from app.utils.render_cache import fragment_cache
+
+    app = make_app(GRADING_MODE='sync')
+    with app.app_context():
+        teacher_id = create_user('bench_teacher', is_teacher=True).id
+        create_user('bench_student')
+        quiz_id = create_quiz(teacher_id, args.questions).id
+        form = form_for(Quiz.query.get(quiz_id))
+        db.session.remove()
+
+    student, teacher = app.test_client(), app.test_client()
+    student.post('/login', data={'email': 'bench_student@example.com', 'password': 'password'})
+    teacher.post('/login', data={'email': 'bench_teacher@example.com', 'password': 'password'})
+    profiles = dict(loaders.LOADER_PROFILES)
+
+    def measure(name, client, url):
+        counts = []
+        for enabled in (False, True):
+            loaders.LOADER_PROFILES[name] = profiles[name] if enabled else ()
+            fragment_cache.clear()
+            with StatementCounter(db.get_engine(app)) as counter:
+                response = client.get(url)
+            assert response.status_code == 200, (url, response.status_code)
+            counts.append(counter.count)
+        print(f'{name:<8} {counts[0]:>6} {counts[1]:>8}')
+
+    print(f'{args.questions}-question quiz')
+    print(f'{"page":<8} {"lazy":>6} {"profile":>8}')
+    student.get(f'/quiz/quiz/{quiz_id}/take')  # start the attempt outside the measurement
+    measure('take', student, f'/quiz/quiz/{quiz_id}/take')
+    with StatementCounter(db.get_engine(app)) as counter:
+        student.get(f'/quiz/quiz/{quiz_id}/take')  # the previous render left the question list cached
+    print(f'{"take*":<8} {"":>6} {counter.count:>8}   (* question list from the fragment cache)')
+
+    with contextlib.redirect_stdout(io.StringIO()):  # the result email is printed without a mail server
+        student.post(f'/quiz/quiz/{quiz_id}/take', data=form)
+    with app.app_context():
+        quiz = Quiz.query.get(quiz_id)
+        quiz.grades_released = True
+        attempt_id = quiz.attempts[0].id
+        db.session.commit()
+    measure('review', student, f'/quiz/quiz/results/{attempt_id}')
+    measure('edit', teacher, f'/quiz/quiz/{quiz_id}/edit')
+    loaders.LOADER_PROFILES.update(profiles)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""Quiz search: FTS5 index vs. LIKE matching over a large catalogue.
+
+    python -m benchmarks.search --quizzes 100000
+"""
+import argparse
+import random
+from datetime import datetime, timedelta
+
+from benchmarks.common import make_app, create_user, timed, percentile
+
+WORDS = ('algebra geometry calculus physics chemistry biology history geography literature '
+         'grammar vocabulary programming python databases networks astronomy economics '
+         'statistics probability music painting anatomy genetics ecology volcano ocean '
+         'river mountain empire revolution equation molecule electron planet galaxy').split()
+SYLLABLES = 'ba ce di fo gu ka le mi no pu ra se ti vo zu'.split()
+
+QUERIES = ('algebra', 'photosynthesis', 'river empire', 'calc', 'python databases networks')
+
+
+def seed_quizzes(author_id, num_quizzes, questions_per_quiz=5, seed=0):
+    """Bulk-insert quizzes with a few questions each, bypassing the ORM and its index events."""
+    from app import db
+    from app.models.quiz import Quiz, Question
+
+    rng = random.Random(seed)
+    # A few thousand filler words so each subject word only appears in a small share of quizzes
+    vocabulary = WORDS + [''.join(rng.choice(SYLLABLES) for _ in range(4)) for _ in range(3000)]
+    now = datetime.utcnow()
+    quizzes, questions = [], []
+    for index in range(num_quizzes):
+        quiz_id = index + 1
+        quizzes.append({'id': quiz_id, 'title': ' '.join(rng.sample(vocabulary, 3)).title(),
+                        'description': ' '.join(rng.sample(vocabulary, 8)), 'author_id': author_id,
+                        'created_at': now - timedelta(minutes=index), 'updated_at': now,
+                        'is_public': True, 'category': 'general_knowledge', 'max_attempts': 1})
+        for q_index in range(questions_per_quiz):
+            questions.append({'quiz_id': quiz_id, 'text': ' '.join(rng.sample(vocabulary, 6)),
+                              'question_type': 'mcq', 'points': 1, 'order': q_index + 1})
+    db.session.execute(Quiz.__table__.insert(), quizzes)
+    db.session.execute(Question.__table__.insert(), questions)
+    db.session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--quizzes', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--like', action='store_true',
+                        help='Also time the LIKE fallback (slow: it scans every quiz and question).')
+    args = parser.parse_args()
+
+    from app import db
+    from app.utils import search
+
+    app = make_app()
+    with app.app_context():
+        author_id = create_user('bench_teacher', is_teacher=True).id
+        seed_quizzes(author_id, args.quizzes)
+        (build_ms,) = timed(search.rebuild_search_index, 1)
+        print(f'Seeded {args.quizzes} quizzes; index rebuilt in {build_ms:.0f} ms')
+
+        print(f'{"query":<28} {"mode":<5} {"hits":>7} {"p50 ms":>8} {"p95 ms":>8}')
+        for terms in QUERIES:
+            for mode in ('fts', 'like') if args.like else ('fts',):
+                search._fts_enabled[db.engine] = mode == 'fts'
+                run = lambda: search.search_query(terms).paginate(
+                    page=1, per_page=search.SEARCH_PAGE_SIZE, error_out=False)
+                timings = timed(run, args.repeat)
+                hits = run().total
+                print(f'{terms:<28} {mode:<5} {hits:>7} {percentile(timings, 50):>8.1f} '
+                      f'{percentile(timings, 95):>8.1f}')
+        search._fts_enabled.pop(db.engine, None)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""App startup: create_app() with the schema version check vs. the old db.create_all().
+
+    python -m benchmarks.startup --repeat 50
+"""
+import argparse
+import logging
+import os
+import tempfile
+
+from benchmarks.common import make_config, make_app, timed, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    from app import create_app, db
+    from app.utils import schema
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='quizwizz-bench-'), 'bench.db')
+    make_app(db_path)  # a fully migrated database, as after `flask schema upgrade`
+    logging.getLogger('app').setLevel(logging.ERROR)
+
+    def create_all_startup():
+        # What create_app used to do on every start
+        app = create_app(make_config(db_path))
+        with app.app_context():
+            db.create_all()
+        db.get_engine(app).dispose()
+
+    def checked_startup():
+        schema._checked_databases.clear()  # every run pays the check, as a new process would
+        app = create_app(make_config(db_path, SKIP_SCHEMA_CHECK=False))
+        db.get_engine(app).dispose()
+
+    def unchecked_startup():
+        app = create_app(make_config(db_path))
+        db.get_engine(app).dispose()
+
+    print(f'{"startup":<22} {"p50 ms":>8} {"p95 ms":>8}')
+    for label, fn in (('db.create_all()', create_all_startup),
+                      ('schema version check', checked_startup),
+                      ('no schema access', unchecked_startup)):
+        fn()  # warm up imports
+        timings = timed(fn, args.repeat)
+        print(f'{label:<22} {percentile(timings, 50):>8.1f} {percentile(timings, 95):>8.1f}')
+
+
+if __name__ == '__main__':
+    main()
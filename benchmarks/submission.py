@@ -0,0 +1,91 @@
+"""Per-submission latency of take_quiz grading against question count.
+
+Compares the original write path (one ORM Answer per question, per-question
+option lookups, score recomputed by reloading attempt.answers) with the
+bulk-insert pipeline in app.utils.grading.
+
+    python -m benchmarks.submission --questions 10 25 50 100 --repeat 50
+"""
+import argparse
+from datetime import datetime
+
+from benchmarks.common import make_app, create_user, create_quiz, form_for, StatementCounter, timed, percentile
+
+
+def legacy_submit(attempt, quiz, form):
+    """The pre-bulk-insert write path from take_quiz, kept here for comparison."""
+    from app import db
+    from app.models.quiz import QuestionOption, Answer
+    for question in quiz.questions:
+        if question.question_type == 'mcq':
+            option_id = form.get(f'question_{question.id}')
+            option = QuestionOption.query.get(option_id)
+            answer = Answer(attempt_id=attempt.id, question_id=question.id, selected_option_id=option_id,
+                            is_correct=option.is_correct if option else False,
+                            points_earned=question.points if option and option.is_correct else 0)
+        else:
+            text_answer = form.get(f'question_{question.id}')
+            correct_option = QuestionOption.query.filter_by(question_id=question.id)\
+                .order_by(QuestionOption.order).first()
+            correct_answer = correct_option.text if correct_option else ""
+            student_answer = ''.join(text_answer.split()).lower() if text_answer else ""
+            is_correct = student_answer == ''.join(correct_answer.split()).lower()
+            answer = Answer(attempt_id=attempt.id, question_id=question.id, text_answer=text_answer,
+                            is_correct=is_correct, points_earned=question.points if is_correct else 0)
+        db.session.add(answer)
+    attempt.completed_at = datetime.utcnow()
+    attempt.score = sum(a.points_earned for a in attempt.answers if a.points_earned)
+    attempt.max_score = sum(q.points for q in quiz.questions)
+    db.session.commit()
+
+
+def run(question_counts, repeat):
+    from app import db
+    from app.models.quiz import Quiz, QuizAttempt
+    from app.utils.grading import submit_attempt
+
+    app = make_app()
+    results = []
+    with app.app_context():
+        teacher_id = create_user('bench_teacher', is_teacher=True).id
+        student_id = create_user('bench_student').id
+        for num_questions in question_counts:
+            quiz_id = create_quiz(teacher_id, num_questions).id
+            db.session.expire_all()
+            form = form_for(Quiz.query.get(quiz_id))
+
+            for label, submit in (('legacy', legacy_submit), ('bulk', submit_attempt)):
+                statements = []
+
+                def one_submission():
+                    # Each submission starts from a fresh session, as a request would
+                    db.session.remove()
+                    quiz = Quiz.query.get(quiz_id)
+                    attempt = QuizAttempt(quiz_id=quiz_id, student_id=student_id)
+                    db.session.add(attempt)
+                    db.session.commit()
+                    with StatementCounter(db.engine) as counter:
+                        submit(attempt, quiz, form)
+                    statements.append(counter.count)
+
+                one_submission()  # warm the answer key cache and connection pool
+                statements.clear()
+                timings = timed(one_submission, repeat)
+                results.append((num_questions, label, percentile(timings, 50), percentile(timings, 95),
+                                sum(statements) / len(statements)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--questions', type=int, nargs='+', default=[10, 25, 50, 100])
+    parser.add_argument('--repeat', type=int, default=30)
+    args = parser.parse_args()
+
+    print(f"{'questions':>9}  {'path':<7} {'p50 ms':>8} {'p95 ms':>8} {'statements':>10}")
+    for num_questions, label, p50, p95, statements in run(args.questions, args.repeat):
+        print(f'{num_questions:>9}  {label:<7} {p50:>8.2f} {p95:>8.2f} {statements:>10.1f}')
+
+
+if __name__ == '__main__':
+    main()
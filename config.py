@@ -21,4 +21,74 @@ class Config:
     MAX_QUESTIONS_PER_QUIZ = 50
     MAX_OPTIONS_PER_QUESTION = 6
     MAX_QUIZ_TITLE_LENGTH = 100
-    MAX_QUESTION_TEXT_LENGTH = 500 
\ No newline at end of file
+    MAX_QUESTION_TEXT_LENGTH = 500
+    
+    # Grading settings
+    GRADING_MODE = os.environ.get('GRADING_MODE') or 'sync'  # 'sync' grades in the request, 'async' queues it
+    GRADING_WORKERS = int(os.environ.get('GRADING_WORKERS') or 2)  # worker threads per web process
+    GRADING_POLL_INTERVAL = 2  # seconds between queue polls when idle
+    GRADING_JOB_TIMEOUT = 300  # seconds before a running job is considered abandoned
+    EXTERNAL_URL = os.environ.get('EXTERNAL_URL') or 'http://localhost:5000'  # base for links in emails sent by workers 
+    
+    # Database schema
+    SKIP_SCHEMA_CHECK = os.environ.get('SKIP_SCHEMA_CHECK') is not None  # skip the startup schema version check
+    
+    # SQL instrumentation (per-request query counts in headers and logs)
+    SQL_INSTRUMENTATION = os.environ.get('DISABLE_SQL_INSTRUMENTATION') is None
+    SQL_DEBUG_HEADERS = os.environ.get('SQL_DEBUG_HEADERS') is not None  # X-DB-* headers outside debug/testing
+    SQL_REPEAT_THRESHOLD = int(os.environ.get('SQL_REPEAT_THRESHOLD') or 10)  # warn (debug/testing) above this many runs of one statement
+    
+    # Request profiler: requests carrying this token in X-Profile or ?_profile= run under cProfile
+    PROFILER_TOKEN = os.environ.get('PROFILER_TOKEN')  # unset disables the profiler entirely
+    PROFILER_DIR = os.environ.get('PROFILER_DIR')  # write .prof files here instead of returning a summary
+    PROFILER_TOP_FUNCTIONS = 40  # functions listed in the returned summary
+    
+    # Metrics (/metrics in Prometheus text format)
+    METRICS_ENABLED = os.environ.get('DISABLE_METRICS') is None
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')  # /metrics requires "Authorization: Bearer <token>"; unset serves it only in debug/testing
+    METRICS_DIR = os.environ.get('METRICS_DIR')  # shared directory that aggregates metrics across worker processes
+    METRICS_FLUSH_INTERVAL = 5  # seconds between writes of this process's metrics to METRICS_DIR
+    
+    # Rendered fragment cache (the take page's question list, per quiz version)
+    RENDER_CACHE_ENTRIES = int(os.environ.get('RENDER_CACHE_ENTRIES') or 256)  # 0 disables the cache
+    RENDER_CACHE_BYTES = int(os.environ.get('RENDER_CACHE_BYTES') or 32 * 1024 * 1024)  # in-memory size bound
+    RENDER_CACHE_DIR = os.environ.get('RENDER_CACHE_DIR')  # directory shared by worker processes; unset keeps it in memory
+    
+    # Per-process caches of the logged-in user and of quiz shares (0 disables either)
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL') or 30)  # seconds another worker may show an old profile
+    SHARE_CACHE_TTL = int(os.environ.get('SHARE_CACHE_TTL') or 300)  # only granted shares are cached
+    ACCESS_CACHE_ENTRIES = 10000  # per cache
+    
+    # Fingerprinted static assets written by `flask assets build`
+    ASSETS_DIR = os.environ.get('ASSETS_DIR') or os.path.join(basedir, 'app', 'static', 'dist')
+    ASSETS_URL_PATH = '/assets'  # served with immutable cache headers; /static keeps the unhashed files
+
+
+class ProductionConfig(Config):
+    """Database settings for multi-threaded servers handling concurrent submissions."""
+    # Applied to every new SQLite connection: WAL lets readers run alongside the
+    # writer, NORMAL syncs only at checkpoints, and writers wait for the lock
+    # instead of failing with "database is locked"
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT') or 10000),  # ms
+        'mmap_size': 256 * 1024 * 1024,  # bytes
+        'cache_size': -64 * 1024,  # negative = KiB, i.e. 64 MB per connection
+    }
+    
+    # Connection pool (size it to the number of server threads)
+    DB_POOL_SIZE = int(os.environ.get('DB_POOL_SIZE') or 10)
+    DB_MAX_OVERFLOW = int(os.environ.get('DB_MAX_OVERFLOW') or 10)
+    DB_POOL_TIMEOUT = 30  # seconds to wait for a free connection
+    
+    # Per-statement hooks cost time on every query; opt in (e.g. for the DB metrics)
+    SQL_INSTRUMENTATION = os.environ.get('ENABLE_SQL_INSTRUMENTATION') is not None
+
+
+# Selected with the FLASK_CONFIG environment variable
+config = {
+    'development': Config,
+    'production': ProductionConfig,
+    'default': Config,
+}